@@ -110,6 +110,15 @@ if [ -d "$INSTALL_DIR/config" ]; then
     echo "  ✓ Cleared cached configurations"
 fi
 
+# Clear device-specific runtime state (spooled uploads carry the source
+# device_id and would be re-uploaded by the clone on first reconnect)
+for path in config/spool config/profiles config/camera_capabilities.json; do
+    if [ -e "$INSTALL_DIR/$path" ]; then
+        rm -rf "${INSTALL_DIR:?}/$path"
+        echo "  ✓ Cleared $path"
+    fi
+done
+
 # Reset Tailscale if installed (each clone needs unique identity)
 TAILSCALE_INSTALLED=false
 if command -v tailscale &> /dev/null; then
@@ -88,6 +88,15 @@ if [ -f "$INSTALL_DIR/config/similarity_cache.json" ]; then
     echo "  ✓ Cleared similarity cache"
 fi
 
+# Clear device-specific runtime state (spooled uploads carry the source
+# device_id and would be re-uploaded by the clone on first reconnect)
+for path in config/spool config/profiles config/camera_capabilities.json; do
+    if [ -e "$INSTALL_DIR/$path" ]; then
+        rm -rf "${INSTALL_DIR:?}/$path"
+        echo "  ✓ Cleared $path"
+    fi
+done
+
 echo ""
 echo -e "${GREEN}Step 4: Configuring okadmin Hotspot for On-Site Setup${NC}"
 if command -v nmcli &> /dev/null; then
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Camera Capability Probe and On-Disk Cache
+
+Enumerates the fourcc/resolution/fps modes a V4L2 camera supports using the
+kernel's VIDIOC_* ioctls (no extra dependencies) and caches the result on disk,
+keyed by the device's card name and bus info. With a cached probe the device
+can go straight to a known-good mode at startup, reject unsupported cloud
+resolution requests without touching the camera, and report its capabilities
+to the cloud.
+
+Cameras that report stepwise/continuous frame sizes (e.g. the Pi's
+bcm2835-v4l2) are stored as a single ranged mode per format, and any size on
+the range's step grid is accepted.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-Linux hosts
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached mode layout changes so old entries are re-probed
+CACHE_VERSION = 2
+
+# ioctl request numbers (linux/videodev2.h, _IOR/_IOWR with 'V')
+VIDIOC_QUERYCAP = 0x80685600
+VIDIOC_ENUM_FMT = 0xC0405602
+VIDIOC_ENUM_FRAMESIZES = 0xC02C564A
+VIDIOC_ENUM_FRAMEINTERVALS = 0xC034564B
+
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_FRMSIZE_TYPE_DISCRETE = 1
+V4L2_FRMIVAL_TYPE_DISCRETE = 1
+
+# struct layouts (all fields are __u32 / __u8 arrays, native alignment)
+_CAPABILITY = struct.Struct("16s32s32sIII3I")          # 104 bytes
+_FMTDESC = struct.Struct("III32sII3I")                 # 64 bytes
+_FRMSIZE = struct.Struct("III6I2I")                    # 44 bytes
+_FRMIVAL = struct.Struct("IIIII6I2I")                  # 52 bytes
+
+
+def _fourcc_to_str(code: int) -> str:
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip()
+
+
+def _cstr(raw: bytes) -> str:
+    return raw.split(b"\0", 1)[0].decode(errors="replace")
+
+
+@dataclass(frozen=True)
+class CameraMode:
+    """A supported capture mode.
+
+    Discrete modes are a single width x height. Stepwise modes (max_width set)
+    cover width..max_width and height..max_height in step_width/step_height
+    increments.
+    """
+
+    fourcc: str
+    width: int
+    height: int
+    fps: tuple[float, ...] = ()
+    max_width: int = 0
+    max_height: int = 0
+    step_width: int = 1
+    step_height: int = 1
+
+    @property
+    def stepwise(self) -> bool:
+        return self.max_width > 0
+
+    @property
+    def label(self) -> str:
+        if not self.stepwise:
+            return f"{self.width}x{self.height}"
+        step = f" step {self.step_width}x{self.step_height}" if (self.step_width, self.step_height) != (1, 1) else ""
+        return f"{self.width}x{self.height}-{self.max_width}x{self.max_height}{step}"
+
+    def supports(self, width: int, height: int) -> bool:
+        if not self.stepwise:
+            return (width, height) == (self.width, self.height)
+        return (
+            self.width <= width <= self.max_width
+            and self.height <= height <= self.max_height
+            and (width - self.width) % self.step_width == 0
+            and (height - self.height) % self.step_height == 0
+        )
+
+    def nearest_size(self, width: int, height: int) -> tuple[int, int]:
+        """Closest size this mode can deliver (snapped onto the step grid)."""
+        if not self.stepwise:
+            return self.width, self.height
+
+        def snap(value: int, low: int, high: int, step: int) -> int:
+            value = min(max(value, low), high)
+            return min(low + round((value - low) / step) * step, high - (high - low) % step)
+
+        return (
+            snap(width, self.width, self.max_width, self.step_width),
+            snap(height, self.height, self.max_height, self.step_height),
+        )
+
+    def at_size(self, width: int, height: int) -> "CameraMode":
+        """Concrete discrete mode for a size within this mode."""
+        if not self.stepwise:
+            return self
+        return CameraMode(self.fourcc, width, height, self.fps)
+
+
+@dataclass
+class CameraCapabilities:
+    """Supported modes of one physical camera."""
+
+    card: str
+    bus_info: str
+    driver: str = ""
+    driver_version: int = 0
+    modes: list[CameraMode] = field(default_factory=list)
+
+    @property
+    def device_key(self) -> str:
+        return f"{self.card}@{self.bus_info}"
+
+    def resolutions(self, fourcc: str | None = None) -> list[str]:
+        """Human-readable supported sizes (ranges for stepwise modes)."""
+        modes = sorted(
+            (m for m in self.modes if fourcc is None or m.fourcc == fourcc),
+            key=lambda m: (m.width, m.height, m.max_width),
+        )
+        return list(dict.fromkeys(m.label for m in modes))
+
+    def find_mode(self, width: int, height: int, preferred_fourcc: str = "MJPG") -> CameraMode | None:
+        """Return the mode for a resolution, preferring `preferred_fourcc`."""
+        matches = [m.at_size(width, height) for m in self.modes if m.supports(width, height)]
+        if not matches:
+            return None
+        for mode in matches:
+            if mode.fourcc == preferred_fourcc:
+                return mode
+        return matches[0]
+
+    def closest_mode(self, width: int, height: int, preferred_fourcc: str = "MJPG") -> CameraMode | None:
+        """Return the supported mode whose pixel count is closest to the request."""
+        candidates = [m for m in self.modes if m.fourcc == preferred_fourcc] or self.modes
+        if not candidates:
+            return None
+        target = width * height
+        sized = [m.at_size(*m.nearest_size(width, height)) for m in candidates]
+        return min(sized, key=lambda m: (abs(m.width * m.height - target), -m.width))
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["modes"] = []
+        for m in self.modes:
+            mode = {"fourcc": m.fourcc, "width": m.width, "height": m.height, "fps": list(m.fps)}
+            if m.stepwise:
+                mode.update(
+                    max_width=m.max_width,
+                    max_height=m.max_height,
+                    step_width=m.step_width,
+                    step_height=m.step_height,
+                )
+            data["modes"].append(mode)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CameraCapabilities":
+        modes = [
+            CameraMode(
+                m["fourcc"],
+                int(m["width"]),
+                int(m["height"]),
+                tuple(m.get("fps", ())),
+                max_width=int(m.get("max_width", 0)),
+                max_height=int(m.get("max_height", 0)),
+                step_width=int(m.get("step_width", 1)) or 1,
+                step_height=int(m.get("step_height", 1)) or 1,
+            )
+            for m in data.get("modes", [])
+        ]
+        return cls(
+            card=data["card"],
+            bus_info=data["bus_info"],
+            driver=data.get("driver", ""),
+            driver_version=int(data.get("driver_version", 0)),
+            modes=modes,
+        )
+
+
+def device_path_for_source(source: int | str) -> str | None:
+    """Map an OpenCV source (index or /dev path) to a V4L2 device node."""
+    if isinstance(source, int):
+        return f"/dev/video{source}"
+    if isinstance(source, str) and source.startswith("/dev/video"):
+        return source
+    return None
+
+
+def query_identity(fd: int) -> tuple[str, str, str, int]:
+    """Return (card, bus_info, driver, driver_version) via VIDIOC_QUERYCAP."""
+    buf = bytearray(_CAPABILITY.size)
+    fcntl.ioctl(fd, VIDIOC_QUERYCAP, buf)
+    driver, card, bus_info, version, *_ = _CAPABILITY.unpack(buf)
+    return _cstr(card), _cstr(bus_info), _cstr(driver), version
+
+
+def _enum_intervals(fd: int, pixelformat: int, width: int, height: int) -> tuple[float, ...]:
+    rates = []
+    index = 0
+    while True:
+        buf = bytearray(_FRMIVAL.pack(index, pixelformat, width, height, 0, *([0] * 8)))
+        try:
+            fcntl.ioctl(fd, VIDIOC_ENUM_FRAMEINTERVALS, buf)
+        except OSError:
+            break
+        fields = _FRMIVAL.unpack(buf)
+        ival_type, numerator, denominator = fields[4], fields[5], fields[6]
+        if ival_type == V4L2_FRMIVAL_TYPE_DISCRETE:
+            if numerator:
+                rates.append(round(denominator / numerator, 2))
+        else:
+            # Stepwise/continuous: record the fastest rate (min interval)
+            if numerator:
+                rates.append(round(denominator / numerator, 2))
+            break
+        index += 1
+    return tuple(sorted(set(rates), reverse=True))
+
+
+def _enum_sizes(fd: int, pixelformat: int) -> list[tuple[int, ...]]:
+    """Return discrete (width, height) sizes, or a single stepwise range
+    (min_w, min_h, max_w, max_h, step_w, step_h)."""
+    sizes = []
+    index = 0
+    while True:
+        buf = bytearray(_FRMSIZE.pack(index, pixelformat, 0, *([0] * 6), 0, 0))
+        try:
+            fcntl.ioctl(fd, VIDIOC_ENUM_FRAMESIZES, buf)
+        except OSError:
+            break
+        fields = _FRMSIZE.unpack(buf)
+        size_type = fields[2]
+        if size_type == V4L2_FRMSIZE_TYPE_DISCRETE:
+            sizes.append((fields[3], fields[4]))
+        else:
+            # Stepwise/continuous: min_width, max_width, step, min_height, max_height, step
+            min_w, max_w, step_w, min_h, max_h, step_h = fields[3:9]
+            sizes.append((min_w, min_h, max_w, max_h, max(1, step_w), max(1, step_h)))
+            break
+        index += 1
+    return sizes
+
+
+def probe_v4l2(device_path: str) -> CameraCapabilities:
+    """Enumerate all capture modes of a V4L2 device.
+
+    Raises:
+        OSError: If the device cannot be opened or is not a V4L2 device
+    """
+    fd = os.open(device_path, os.O_RDWR | os.O_NONBLOCK)
+    try:
+        card, bus_info, driver, version = query_identity(fd)
+        modes = []
+        fmt_index = 0
+        while True:
+            buf = bytearray(_FMTDESC.pack(fmt_index, V4L2_BUF_TYPE_VIDEO_CAPTURE, 0, b"", 0, 0, 0, 0, 0))
+            try:
+                fcntl.ioctl(fd, VIDIOC_ENUM_FMT, buf)
+            except OSError:
+                break
+            pixelformat = _FMTDESC.unpack(buf)[4]
+            fourcc = _fourcc_to_str(pixelformat)
+            for size in _enum_sizes(fd, pixelformat):
+                if len(size) == 2:
+                    fps = _enum_intervals(fd, pixelformat, *size)
+                    modes.append(CameraMode(fourcc, size[0], size[1], fps))
+                else:
+                    # Rates at the largest size are the conservative bound
+                    min_w, min_h, max_w, max_h, step_w, step_h = size
+                    fps = _enum_intervals(fd, pixelformat, max_w, max_h)
+                    modes.append(CameraMode(fourcc, min_w, min_h, fps, max_w, max_h, step_w, step_h))
+            fmt_index += 1
+    finally:
+        os.close(fd)
+
+    return CameraCapabilities(
+        card=card,
+        bus_info=bus_info,
+        driver=driver,
+        driver_version=version,
+        modes=modes,
+    )
+
+
+class CapabilityCache:
+    """JSON file of probed capabilities keyed by `card@bus_info`."""
+
+    def __init__(self, path: str | Path = "config/camera_capabilities.json") -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _load_all(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable capability cache {self.path}: {e}")
+            return {}
+
+    def get(self, device_key: str, driver_version: int | None = None) -> CameraCapabilities | None:
+        entry = self._load_all().get(device_key)
+        if entry is None or entry.get("cache_version") != CACHE_VERSION:
+            return None
+        caps = CameraCapabilities.from_dict(entry)
+        if driver_version is not None and caps.driver_version != driver_version:
+            logger.info(f"Capability cache stale for {device_key} (driver changed), re-probing")
+            return None
+        return caps
+
+    def put(self, caps: CameraCapabilities) -> None:
+        with self._lock:
+            entries = self._load_all()
+            entries[caps.device_key] = {**caps.to_dict(), "cache_version": CACHE_VERSION}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(entries, indent=2))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Failed to write capability cache {self.path}: {e}")
+
+
+def load_capabilities(source: int | str, cache: CapabilityCache, refresh: bool = False) -> CameraCapabilities | None:
+    """Return capabilities for a camera source, probing only on a cache miss.
+
+    Returns None for sources that are not local V4L2 devices (RTSP, files,
+    non-Linux hosts) so callers fall back to trial-and-error negotiation.
+    """
+    device_path = device_path_for_source(source)
+    if device_path is None or fcntl is None:
+        return None
+
+    try:
+        fd = os.open(device_path, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            card, bus_info, _, version = query_identity(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"Capability probe unavailable for {device_path}: {e}")
+        return None
+
+    if not refresh:
+        caps = cache.get(f"{card}@{bus_info}", driver_version=version)
+        if caps is not None:
+            logger.info(f"Camera capabilities loaded from cache ({caps.device_key}, {len(caps.modes)} modes)")
+            return caps
+
+    try:
+        caps = probe_v4l2(device_path)
+    except OSError as e:
+        logger.warning(f"Capability probe failed for {device_path}: {e}")
+        return None
+
+    logger.info(f"Camera capabilities probed ({caps.device_key}, {len(caps.modes)} modes)")
+    cache.put(caps)
+    return caps
+
+
+__all__ = [
+    "CameraMode",
+    "CameraCapabilities",
+    "CapabilityCache",
+    "load_capabilities",
+    "probe_v4l2",
+]
@@ -2,9 +2,21 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import base64
+import logging
+import os
 import pathlib
+import queue
+import threading
+import time
 from typing import Protocol
 
+from device.quality import score_frame, select_best
+
+logger = logging.getLogger(__name__)
+
+# Timing debug fields on Frame (read once; the environment does not change at runtime)
+TIMING_DEBUG = os.environ.get("ENABLE_TIMING_DEBUG", "").lower() == "true"
+
 
 def create_thumbnail(image_bytes: bytes, max_size: tuple[int, int] = (400, 300), quality: int = 85) -> bytes:
     """Create a thumbnail from image bytes.
@@ -66,6 +78,19 @@ class Frame:
     # Timing debug fields (populated when ENABLE_TIMING_DEBUG=true)
     debug_capture_time: float | None = None  # Timestamp when capture() was called
     debug_thumbnail_time: float | None = None  # Timestamp after thumbnail created
+    # On-device quality scores of the selected frame (populated for best-of-N captures)
+    quality: dict | None = None
+
+
+def _choose_frame(frames: list, cv2_module) -> tuple[object, dict]:
+    """Score candidate frames and return the best one with its scores."""
+    qualities = [score_frame(frame, cv2_module) for frame in frames]
+    best = select_best(qualities)
+    scores = qualities[best].to_dict()
+    scores["candidates"] = len(frames)
+    scores["selected"] = best
+    scores["score_ms"] = round(sum(q.score_ms for q in qualities), 3)
+    return frames[best], scores
 
 
 class Camera(Protocol):
@@ -83,7 +108,16 @@ class StubCamera:
             b"/9j/4AAQSkZJRgABAQEASABIAAD/2wBDABALDA4MChAODQ4SEhQfJCQfIiEhJycnKysyKysvPz8/Pz9FSkNFRkdMT01QUFVVWFhZWl5dXl5mZmZmaWlp/2wBDARESEhMfJCYfJiZkKykpZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRkZGRk/8AAEQgAAgACAwEiAAIRAQMRAf/EABQAAQAAAAAAAAAAAAAAAAAAAAX/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAwT/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxEAPwCfAAf/2Q=="
         )
 
-    def capture(self) -> Frame:
+    def capture(
+        self,
+        flush_buffer_frames: int = 0,
+        flip_horizontal: bool = False,
+        flip_vertical: bool = False,
+        best_of: int = 1,
+        score_quality: bool = False,
+    ) -> Frame:
+        # Flip and quality settings are accepted for interface parity but not
+        # applied (the sample is served as-is without decoding)
         if self._sample_path and self._sample_path.exists():
             data = self._sample_path.read_bytes()
             encoding = self._sample_path.suffix.lstrip(".") or "jpeg"
@@ -94,6 +128,191 @@ class StubCamera:
         return None
 
 
+class ReplayCamera:
+    """Replay frames from a video file or an image directory.
+
+    Frames are decoded by a background prefetch thread into a bounded queue,
+    so `capture()` only pays for flip + encode, like a live OpenCVCamera.
+    Used for load testing and replaying incidents without camera hardware.
+
+    Pacing modes:
+        realtime: Frames arrive on the source timeline and captures get the
+                  freshest one (older frames are dropped like a live camera)
+        fixed:    Serve consecutive frames, at most `fps` captures per second
+        fast:     Serve consecutive frames as fast as they are requested
+    """
+
+    IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+    VIDEO_SUFFIXES = {".mp4", ".avi", ".mkv", ".mov", ".webm", ".mjpeg", ".mjpg", ".h264"}
+    PACING_MODES = ("realtime", "fixed", "fast")
+
+    _END = object()
+
+    def __init__(
+        self,
+        path: pathlib.Path | str,
+        *,
+        pacing: str = "realtime",
+        fps: float | None = None,
+        cache_frames: int = 32,
+        loop: bool = True,
+        encoding: str = "jpeg",
+    ) -> None:
+        try:
+            import cv2  # type: ignore
+        except ImportError as exc:  # pragma: no cover - depends on optional dep
+            raise RuntimeError("opencv-python is required for ReplayCamera") from exc
+
+        if pacing not in self.PACING_MODES:
+            raise ValueError(f"Unknown replay pacing {pacing!r} (expected one of {', '.join(self.PACING_MODES)})")
+
+        self._cv2 = cv2
+        self._path = pathlib.Path(path)
+        self._encoding = encoding.lstrip(".") or "jpeg"
+        self._pacing = pacing
+        self._loop = loop
+
+        if self._path.is_dir():
+            self._images = sorted(p for p in self._path.iterdir() if p.suffix.lower() in self.IMAGE_SUFFIXES)
+            if not self._images:
+                raise RuntimeError(f"No images found in replay directory {self._path}")
+            self._fps = fps or 1.0
+        else:
+            self._images = None
+            probe = cv2.VideoCapture(str(self._path))
+            if not probe.isOpened():
+                raise RuntimeError(f"Unable to open replay video {self._path}")
+            self._fps = fps or probe.get(cv2.CAP_PROP_FPS) or 30.0
+            probe.release()
+
+        self.resolution: tuple[int, int] | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, cache_frames))
+        self._stop = threading.Event()
+        self._last_capture_at = 0.0
+        self._thread = threading.Thread(target=self._prefetch, name="replay-prefetch", daemon=True)
+        self._thread.start()
+
+    def _iter_source(self):
+        """Yield decoded frames for one pass over the source."""
+        if self._images is not None:
+            for image_path in self._images:
+                frame = self._cv2.imread(str(image_path), self._cv2.IMREAD_COLOR)
+                if frame is None:
+                    logger.warning(f"Skipping unreadable replay image: {image_path}")
+                    continue
+                yield frame
+            return
+
+        cap = self._cv2.VideoCapture(str(self._path))
+        try:
+            while True:
+                ok, frame = cap.read()
+                if not ok or frame is None:
+                    return
+                yield frame
+        finally:
+            cap.release()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _put_latest(self, item) -> None:
+        """Enqueue without blocking, dropping the oldest frame when full."""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _prefetch(self) -> None:
+        started_at = time.monotonic()
+        index = 0
+        while not self._stop.is_set():
+            produced = False
+            for frame in self._iter_source():
+                produced = True
+                if self._pacing == "realtime":
+                    # Emit frames on the source timeline, like a live camera
+                    if self._stop.wait(max(0.0, started_at + index / self._fps - time.monotonic())):
+                        return
+                    self._put_latest((index, frame))
+                elif not self._put((index, frame)):
+                    return
+                index += 1
+            if not produced or not self._loop:
+                self._put(self._END)
+                return
+
+    def _take(self, item):
+        if item is self._END:
+            # Leave the marker for subsequent captures
+            self._put_latest(item)
+            raise RuntimeError(f"Replay source exhausted: {self._path}")
+        return item[1]
+
+    def capture(
+        self,
+        flush_buffer_frames: int = 0,
+        flip_horizontal: bool = False,
+        flip_vertical: bool = False,
+        best_of: int = 1,
+        score_quality: bool = False,
+    ) -> Frame:
+        if self._pacing == "fixed":
+            wait = self._last_capture_at + 1.0 / self._fps - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+        frame = self._take(self._queue.get())
+        if self._pacing == "realtime":
+            # Skip to the freshest frame, like flushing a live camera buffer
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._END:
+                    self._put_latest(item)
+                    break
+                frame = item[1]
+
+        quality = None
+        if best_of > 1 or score_quality:
+            candidates = [frame] + [self._take(self._queue.get()) for _ in range(best_of - 1)]
+            frame, quality = _choose_frame(candidates, self._cv2)
+        self._last_capture_at = time.monotonic()
+
+        if flip_horizontal and flip_vertical:
+            frame = self._cv2.flip(frame, -1)
+        elif flip_horizontal:
+            frame = self._cv2.flip(frame, 1)
+        elif flip_vertical:
+            frame = self._cv2.flip(frame, 0)
+
+        h, w = frame.shape[:2]
+        self.resolution = (w, h)
+
+        success, buffer = self._cv2.imencode(f".{self._encoding}", frame)
+        if not success:
+            raise RuntimeError(f"OpenCV failed to encode frame as {self._encoding}")
+        return Frame(data=buffer.tobytes(), encoding=self._encoding, quality=quality)
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+
 class OpenCVCamera:
     """Capture frames from an OpenCV-compatible source (USB/RTSP)."""
 
@@ -124,6 +343,7 @@ class OpenCVCamera:
         resolution: tuple[int, int] | None = None,
         backend: str | int | None = None,
         warmup_frames: int = 10,
+        fourcc: str = "MJPG",
     ) -> None:
         try:
             import cv2  # type: ignore
@@ -138,16 +358,14 @@ class OpenCVCamera:
             raise RuntimeError(f"Unable to open camera source {source!r}")
 
         # Set MJPG codec to enable higher resolutions (YUYV only supports low res)
-        fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-        self._cap.set(cv2.CAP_PROP_FOURCC, fourcc)
+        # A probed mode may request a different fourcc the camera is known to support
+        self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc.ljust(4)[:4]))
 
         if resolution:
             width, height = resolution
             self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, float(width))
             self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, float(height))
             # Log actual resolution after setting (camera may not support requested resolution)
-            import logging
-            logger = logging.getLogger(__name__)
             actual_w = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             actual_h = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             logger.info(f"Requested resolution {width}x{height}, actual: {actual_w}x{actual_h}")
@@ -158,6 +376,13 @@ class OpenCVCamera:
                     f"Camera failed to set resolution {width}x{height}. "
                     f"The camera may not support this resolution."
                 )
+        self.resolution = (
+            int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        self.expected_fps = float(self._cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        # Optional freshness hook: monitor(frame_or_None, read_seconds, grab_fps, expected_fps)
+        self.frame_monitor = None
         if warmup_frames > 0:
             self._warmup(warmup_frames)
 
@@ -186,24 +411,53 @@ class OpenCVCamera:
         flush_buffer_frames: int = 15,
         flip_horizontal: bool = False,
         flip_vertical: bool = False,
+        best_of: int = 1,
+        score_quality: bool = False,
     ) -> Frame:
-        import os
-        import time
+        """Capture the freshest frame.
+
+        Args:
+            flush_buffer_frames: Buffered frames to discard before reading
+            flip_horizontal: Mirror the frame horizontally
+            flip_vertical: Flip the frame vertically
+            best_of: Read this many consecutive frames and keep the sharpest
+                well-exposed one (only the selected frame is encoded)
+            score_quality: Attach quality scores even when best_of is 1
+        """
+        self._require_open()
 
         # Timing debug: Record capture start time
-        timing_enabled = os.environ.get("ENABLE_TIMING_DEBUG", "").lower() == "true"
-        t0 = time.time() if timing_enabled else None
+        t0 = time.time() if TIMING_DEBUG else None
 
         # Flush camera buffer to get the freshest frame possible
         # USB cameras buffer many frames internally, causing severe lag (20-30 seconds)
         # We rapidly read and discard frames to clear the buffer
+        t_flush = time.monotonic()
         for _ in range(flush_buffer_frames):
             self._cap.grab()  # Grab frame from buffer without decoding (faster)
+        flush_seconds = time.monotonic() - t_flush
 
         # Now read the actual frame we want (should be the freshest available)
+        t_read = time.monotonic()
         ok, frame = self._cap.read()
+        read_seconds = time.monotonic() - t_read
         if not ok or frame is None:
+            if self.frame_monitor is not None:
+                self.frame_monitor(None, read_seconds)
             raise RuntimeError("Failed to capture frame from camera")
+        if self.frame_monitor is not None:
+            grab_fps = flush_buffer_frames / flush_seconds if flush_buffer_frames and flush_seconds > 0 else None
+            self.frame_monitor(frame, read_seconds, grab_fps, self.expected_fps)
+
+        # Best-of-N: read more frames in quick succession and keep the best
+        quality = None
+        if best_of > 1 or score_quality:
+            candidates = [frame]
+            for _ in range(best_of - 1):
+                ok, candidate = self._cap.read()
+                if ok and candidate is not None:
+                    candidates.append(candidate)
+            frame, quality = _choose_frame(candidates, self._cv2)
 
         # Apply flip transformations if requested
         # cv2.flip: 0 = vertical, 1 = horizontal, -1 = both
@@ -215,8 +469,6 @@ class OpenCVCamera:
             frame = self._cv2.flip(frame, 0)   # Flip vertically
 
         # Log actual frame dimensions for debugging
-        import logging
-        logger = logging.getLogger(__name__)
         h, w = frame.shape[:2]
         logger.debug(f"Captured frame dimensions: {w}x{h}")
 
@@ -232,7 +484,7 @@ class OpenCVCamera:
         thumbnail = None
 
         # Timing debug: Record thumbnail complete time
-        t1 = time.time() if timing_enabled else None
+        t1 = time.time() if TIMING_DEBUG else None
 
         return Frame(
             data=full_image,
@@ -240,8 +492,24 @@ class OpenCVCamera:
             thumbnail=thumbnail,
             debug_capture_time=t0,
             debug_thumbnail_time=t1,
+            quality=quality,
         )
 
+    def probe(self) -> bool:
+        """Read one frame and report it to the frame monitor (idle health check)."""
+        self._require_open()
+        t_read = time.monotonic()
+        ok, frame = self._cap.read()
+        read_seconds = time.monotonic() - t_read
+        if self.frame_monitor is not None:
+            self.frame_monitor(frame if ok else None, read_seconds)
+        return bool(ok and frame is not None)
+
+    def _require_open(self) -> None:
+        if self._cap is None:
+            # Released and not yet replaced, e.g. while the watchdog reopens it
+            raise RuntimeError("Camera released (reopen in progress)")
+
     def release(self) -> None:
         if getattr(self, "_cap", None) is not None:
             self._cap.release()
@@ -254,4 +522,4 @@ class OpenCVCamera:
             pass
 
 
-__all__ = ["Frame", "Camera", "StubCamera", "OpenCVCamera"]
+__all__ = ["Frame", "Camera", "StubCamera", "ReplayCamera", "OpenCVCamera"]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Debug Frame Writer
+
+Writes `--save-frames` captures on a background thread so slow SD cards never
+stall the capture path. Frames are queued as their already-encoded bytes
+(nothing is encoded twice), dropped when the queue is full, written via
+temp-file-and-rename with batched fsync, and rotated as a ring of the last
+N frames / MB.
+
+Files are named `<UTC timestamp>_<trigger_id>.<ext>`, so a repeated trigger id
+never overwrites an earlier frame. Only files matching that pattern are
+adopted into (and rotated out of) the ring.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import os
+import queue
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {"jpeg": "jpg"}
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+_FRAME_NAME = re.compile(r"^\d{8}T\d{12}Z_.+\.(jpg|jpeg|png|bmp|webp)$", re.IGNORECASE)
+
+
+class DebugFrameWriter:
+    """Bounded, rotating background writer for debug frames."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        max_frames: int = 500,
+        max_bytes: int = 200 * 1024 * 1024,
+        queue_size: int = 8,
+        fsync_batch: int = 8,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.fsync_batch = max(1, fsync_batch)
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._ring: collections.deque[tuple[Path, int]] = collections.deque()
+        self._ring_bytes = 0
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, trigger_id: str) -> bool:
+        """Queue a frame for writing; never blocks.
+
+        Returns:
+            False if the queue was full and the frame was dropped
+        """
+        ext = _EXTENSIONS.get(frame.encoding, frame.encoding)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        try:
+            safe_id = _UNSAFE_CHARS.sub("_", str(trigger_id))[:100] or "unknown"
+            self._queue.put_nowait((f"{stamp}_{safe_id}.{ext}", frame.data))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Debug frame writer busy, dropped frame {trigger_id} ({self.dropped} dropped)")
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued frames and stop the writer thread."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout=timeout)
+
+    def _load_existing(self) -> None:
+        """Seed the ring with frames from previous runs so limits persist."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".tmp" and _FRAME_NAME.match(path.name[1:-4]):
+                path.unlink(missing_ok=True)  # Interrupted write
+            elif _FRAME_NAME.match(path.name) and path.is_file():
+                stat = path.stat()
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._ring.append((path, size))
+            self._ring_bytes += size
+        self._rotate()
+
+    def _rotate(self) -> None:
+        while self._ring and (len(self._ring) > self.max_frames or self._ring_bytes > self.max_bytes):
+            path, size = self._ring.popleft()
+            self._ring_bytes -= size
+            path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        try:
+            self._load_existing()
+        except OSError as e:
+            logger.error(f"Debug frame directory {self.directory} unavailable: {e}")
+
+        stopping = False
+        while not stopping:
+            # Block for one frame, then take whatever else is queued (up to a batch)
+            batch = [self._queue.get()]
+            while len(batch) < self.fsync_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    logger.error(f"Failed to write debug frames: {e}")
+
+    def _discard(self, tmp_path: Path, fd: int | None, error: OSError) -> None:
+        """Drop one failed frame without affecting the rest of the batch."""
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        tmp_path.unlink(missing_ok=True)
+        logger.error(f"Failed to write debug frame {tmp_path.name[1:-4]}: {error}")
+
+    def _write_batch(self, batch: list[tuple[str, bytes]]) -> None:
+        """Write temp files, fsync them back to back, then rename into place.
+
+        A failure on one frame (e.g. ENOSPC) discards only that frame.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, data in batch:
+            tmp_path = self.directory / f".{name}.tmp"
+            fd = None
+            try:
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            except OSError as e:
+                self._discard(tmp_path, fd, e)
+                continue
+            written.append((fd, tmp_path, self.directory / name, len(data)))
+
+        # Issue the fsyncs together so the card can merge the flushes
+        pending = []
+        for fd, tmp_path, final_path, size in written:
+            try:
+                os.fsync(fd)
+                os.close(fd)
+            except OSError as e:
+                self._discard(tmp_path, fd, e)
+                continue
+            pending.append((tmp_path, final_path, size))
+
+        for tmp_path, final_path, size in pending:
+            try:
+                os.replace(tmp_path, final_path)
+            except OSError as e:
+                self._discard(tmp_path, None, e)
+                continue
+            self._ring.append((final_path, size))
+            self._ring_bytes += size
+            logger.debug(f"Saved debug frame: {final_path}")
+
+        # One directory fsync makes the whole batch of renames durable
+        try:
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass  # Directory fsync is unsupported on some platforms
+
+        self._rotate()
+
+
+__all__ = ["DebugFrameWriter"]
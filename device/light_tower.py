@@ -17,15 +17,31 @@ logger = logging.getLogger(__name__)
 class LightTower:
     """Controller for serial-connected light tower with RGB lights and buzzer."""
 
-    def __init__(self, port: str = "/dev/ttyUSB0", baud: int = 9600):
+    # State transitions as command sequences; numbers are pauses in seconds.
+    # By default commands are sent one at a time with these pauses (the
+    # spacing the tower is known to accept). With batch_writes the commands
+    # are sent as one precomputed serial write and the pauses are dropped;
+    # only enable that for towers verified to accept back-to-back frames.
+    TRANSITIONS = {
+        "alert": ("green_off", 0.05, "red_on", 0.05, "beep_intermit"),
+        "normal": (
+            0.1, "red_off", 0.05, "yellow_off", 0.05, "green_off", 0.05, "beep_off", 0.05,
+            0.1, "green_on",
+        ),
+        "off": ("red_off", 0.05, "yellow_off", 0.05, "green_off", 0.05, "beep_off", 0.05),
+    }
+
+    def __init__(self, port: str = "/dev/ttyUSB0", baud: int = 9600, batch_writes: bool = False):
         self.port = port
         self.baud = baud
+        self.batch_writes = batch_writes
         self._beep_timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        self.state = "unknown"  # Last requested state: 'alert', 'normal' or 'off'
 
-        # Verify port is accessible at startup
+        # Open the port once and keep it open (no per-command open latency)
         try:
-            with serial.Serial(self.port, self.baud, timeout=1) as ser:
-                pass  # Just test connection
+            self._serial = self._open_port()
             logger.info(f"Light tower connected on {port}")
         except serial.SerialException as e:
             raise RuntimeError(f"Light tower port {port} not available: {e}")
@@ -50,6 +66,27 @@ class LightTower:
             "beep_off":          bytes.fromhex("A0 04 00 A4"),
         }
 
+        self._transition_bytes = {
+            state: b"".join(self.commands[step] for step in sequence if isinstance(step, str))
+            for state, sequence in self.TRANSITIONS.items()
+        }
+
+    def _open_port(self):
+        return serial.Serial(self.port, self.baud, timeout=1, write_timeout=1)
+
+    def close(self) -> None:
+        """Close the serial port."""
+        with self._lock:
+            self._close_port()
+
+    def _close_port(self) -> None:
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except Exception:
+                pass
+            self._serial = None
+
     def send(self, name: str) -> bool:
         """Send a command to the light tower.
 
@@ -67,22 +104,42 @@ class LightTower:
         return self._send_raw(data, name)
 
     def _send_raw(self, data: bytes, name: str = "") -> bool:
-        """Send raw bytes to the light tower via serial."""
-        try:
-            with serial.Serial(self.port, self.baud, timeout=1) as ser:
-                ser.write(data)
-            logger.debug(f"Light tower command sent: {name}")
-            return True
-        except Exception as e:
-            logger.error(f"Light tower serial error: {e}")
+        """Send raw bytes to the light tower via serial.
+
+        Reopens the port once if the write fails (e.g. USB adapter replugged).
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._serial is None:
+                        self._serial = self._open_port()
+                    self._serial.write(data)
+                    self._serial.flush()
+                    logger.debug(f"Light tower command sent: {name}")
+                    return True
+                except Exception as e:
+                    logger.error(f"Light tower serial error: {e}")
+                    self._close_port()
             return False
 
+    def _apply_transition(self, state: str) -> bool:
+        """Send all commands for a state transition."""
+        if self.batch_writes:
+            return self._send_raw(self._transition_bytes[state], state)
+
+        ok = True
+        for step in self.TRANSITIONS[state]:
+            if isinstance(step, str):
+                ok = self.send(step) and ok
+            else:
+                time.sleep(step)
+        return ok
+
     def all_off(self) -> None:
         """Turn off all lights (including flash modes) and buzzer."""
         self._cancel_beep_timer()
-        for cmd in ["red_off", "yellow_off", "green_off", "beep_off"]:
-            self._send_raw(self.commands[cmd], cmd)
-            time.sleep(0.05)
+        self._apply_transition("off")
+        self.state = "off"
         logger.info("Light tower: all off")
 
     def _cancel_beep_timer(self) -> None:
@@ -91,29 +148,28 @@ class LightTower:
             self._beep_timer.cancel()
             self._beep_timer = None
 
-    def trigger_alert(self, beep_duration: float = 3.0) -> None:
+    def trigger_alert(self, beep_duration: float = 3.0) -> bool:
         """Trigger alert state: red light on (solid) + beep (timed).
 
         Args:
             beep_duration: Seconds before beep automatically turns off
+
+        Returns:
+            True if the transition was written to the tower
         """
         self._cancel_beep_timer()
 
-        # Turn off other lights first
-        self.send("green_off")
-        time.sleep(0.05)
-
-        # Start red light (solid) and intermittent beep
-        self.send("red_on")
-        time.sleep(0.05)
-        self.send("beep_intermit")
+        # Green off, red light (solid) on and intermittent beep
+        ok = self._apply_transition("alert")
 
         # Schedule beep to turn off after duration
         self._beep_timer = threading.Timer(beep_duration, self._beep_off_callback)
         self._beep_timer.daemon = True
         self._beep_timer.start()
 
+        self.state = "alert"
         logger.info(f"Light tower: ALERT (beep will stop after {beep_duration}s)")
+        return ok
 
     def _beep_off_callback(self) -> None:
         """Callback to turn off beep after timer expires."""
@@ -121,32 +177,35 @@ class LightTower:
         self._beep_timer = None
         logger.debug("Light tower: beep auto-off")
 
-    def trigger_normal(self) -> None:
-        """Trigger normal state: all off, then green light on."""
-        self._cancel_beep_timer()
+    def trigger_normal(self) -> bool:
+        """Trigger normal state: all off, then green light on.
 
-        # Turn everything off first
-        time.sleep(0.1)
-        self.all_off()
-        time.sleep(0.1)
+        Returns:
+            True if the transition was written to the tower
+        """
+        self._cancel_beep_timer()
 
-        # Turn on green
-        self.send("green_on")
+        # Everything off, then green on
+        ok = self._apply_transition("normal")
 
+        self.state = "normal"
         logger.info("Light tower: NORMAL (green)")
+        return ok
 
-    def handle_alarm_state(self, state: str, beep_duration: float = 3.0) -> None:
+    def handle_alarm_state(self, state: str, beep_duration: float = 3.0) -> bool:
         """Handle alarm based on AI evaluation state.
 
         Args:
             state: AI evaluation state ('alert', 'normal', 'uncertain')
             beep_duration: Seconds before beep turns off for alerts
+
+        Returns:
+            True if the transition was written to the tower
         """
         if state == "alert":
-            self.trigger_alert(beep_duration)
-        else:
-            # 'normal' and 'uncertain' both show green
-            self.trigger_normal()
+            return self.trigger_alert(beep_duration)
+        # 'normal' and 'uncertain' both show green
+        return self.trigger_normal()
 
 
 # CLI interface for testing
@@ -3,7 +3,8 @@
 Visant Device Client v2.0 - Cloud-Triggered Architecture
 
 This is a simplified device client that listens for capture commands from the cloud
-and executes them. All trigger scheduling logic now lives in the cloud.
+and executes them. Trigger scheduling lives in the cloud; the cloud can optionally
+push an interval schedule that the device then runs locally (see device/scheduler.py).
 
 Usage:
     python -m device.main \\
@@ -18,6 +19,12 @@ import json
 import base64
 import argparse
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Reference point for cold-start timing (process start to first capture)
+STARTUP_T0 = time.monotonic()
 
 # Import version number
 from version import __version__ as DEVICE_VERSION
@@ -29,8 +36,15 @@ import requests
 # Add parent directory to path to import from device module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from device.capture import OpenCVCamera, StubCamera
+from device.camera_probe import CapabilityCache, load_capabilities
+from device.capture import Frame, OpenCVCamera, ReplayCamera, StubCamera
+from device.frame_writer import DebugFrameWriter
 from device.light_tower import LightTower
+from device.profiling import Profiler
+from device.scheduler import LocalScheduler
+from device.spool import UploadSpool
+from device.status import STATUS, start_status_server
+from device.watchdog import CameraWatchdog
 
 logging.basicConfig(
     level=logging.INFO,
@@ -48,69 +62,160 @@ def parse_args():
     parser.add_argument("--device-id", required=True, help="Device identifier (e.g., FLOOR1)")
 
     # Camera configuration
-    parser.add_argument("--camera-source", default="0", help="Camera source (0 for default webcam, path for image file, RTSP URL)")
+    parser.add_argument("--camera-source", default="0", help="Camera source (0 for default webcam, path for image file, video file or image directory, RTSP URL)")
     parser.add_argument("--camera-backend", default="v4l2", help="OpenCV backend (v4l2, dshow, msmf, etc.)")
     parser.add_argument("--camera-resolution", default="640x480", help="Camera resolution (e.g., 1920x1080)")
     parser.add_argument("--camera-warmup", type=int, default=2, help="Number of warmup frames to discard")
     parser.add_argument("--flip-horizontal", action="store_true", help="Flip image horizontally (mirror)")
     parser.add_argument("--flip-vertical", action="store_true", help="Flip image vertically")
+    parser.add_argument("--best-of", type=int, default=1, help="Capture N frames and upload only the sharpest well-exposed one")
+    parser.add_argument("--quality-scores", action="store_true", help="Attach on-device quality scores to every capture")
+    parser.add_argument("--replay-pacing", choices=ReplayCamera.PACING_MODES, default="realtime", help="Pacing for video/image-directory sources (realtime, fixed, fast)")
+    parser.add_argument("--replay-fps", type=float, default=None, help="Replay frame rate (default: video fps, or 1 for image directories)")
+    parser.add_argument("--replay-cache-frames", type=int, default=32, help="Number of decoded replay frames to prefetch")
+    parser.add_argument("--replay-loop", action=argparse.BooleanOptionalAction, default=True, help="Loop replay sources when exhausted")
+    parser.add_argument("--camera-watchdog", action=argparse.BooleanOptionalAction, default=True, help="Detect stalled/frozen cameras and reopen them automatically")
+    parser.add_argument("--watchdog-stall-seconds", type=float, default=5.0, help="Frame read time treated as a camera stall")
+    parser.add_argument("--watchdog-probe-interval", type=float, default=30.0, help="Seconds between idle camera health probes (0 to disable)")
+    parser.add_argument("--watchdog-recovery-cooldown", type=float, default=300.0, help="Minimum seconds between frozen/low-fps camera reopens")
+    parser.add_argument("--camera-caps-cache", default="config/camera_capabilities.json", help="Capability probe cache file (empty to disable probing)")
+    parser.add_argument("--camera-probe-refresh", action="store_true", help="Re-probe camera capabilities instead of using the cache")
 
     # Alarm tower configuration (enabled by default, auto-disables if port unavailable)
     parser.add_argument("--alarm-enabled", action=argparse.BooleanOptionalAction, default=True, help="Enable alarm light tower")
     parser.add_argument("--alarm-port", default="/dev/ttyUSB0", help="Serial port for alarm tower")
     parser.add_argument("--alarm-baud", type=int, default=9600, help="Baud rate for alarm tower")
     parser.add_argument("--alarm-beep-duration", type=float, default=3.0, help="Duration of beep in seconds for alerts")
+    parser.add_argument("--alarm-batch-writes", action=argparse.BooleanOptionalAction, default=False, help="Send each tower transition as one batched serial write (only for towers verified to accept back-to-back commands)")
+    parser.add_argument("--alarm-sla-ms", type=float, default=500.0, help="Warn when an alarm takes longer than this from event to serial write (ms)")
 
     # Connection settings
     parser.add_argument("--upload-timeout", type=int, default=30, help="Timeout for capture upload (seconds)")
     parser.add_argument("--stream-timeout", type=int, default=70, help="Timeout for SSE stream read (seconds)")
     parser.add_argument("--reconnect-delay", type=int, default=5, help="Delay before reconnecting after error (seconds)")
+    parser.add_argument("--command-queue-size", type=int, default=16, help="Maximum queued capture/config commands (e.g. while the camera starts)")
+
+    # Local schedule (pushed by the cloud via update_config)
+    parser.add_argument("--spool-dir", default="config/spool", help="Directory for captures spooled while offline")
+    parser.add_argument("--spool-max-items", type=int, default=200, help="Maximum number of spooled captures")
+
+    # Local status endpoint (disabled unless a port is given)
+    parser.add_argument("--status-port", type=int, default=0, help="Port for the local status server (0 to disable)")
+    parser.add_argument("--status-bind", default="127.0.0.1", help="Address for the status server (localhost or Tailscale IP)")
 
     # Debug options
     parser.add_argument("--save-frames", action="store_true", help="Save captured frames locally for debugging")
     parser.add_argument("--save-frames-dir", default="debug_captures", help="Directory for saved frames")
+    parser.add_argument("--save-frames-max-count", type=int, default=500, help="Keep at most this many saved frames (oldest deleted first)")
+    parser.add_argument("--save-frames-max-mb", type=float, default=200.0, help="Keep at most this many MB of saved frames")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
 
+    # Profiling (idle until requested via update_config or SIGUSR1)
+    parser.add_argument("--profile-dir", default="config/profiles", help="Directory for profiling artifacts")
+    parser.add_argument("--profile-max-mb", type=float, default=50.0, help="Maximum size of the profiling directory (MB)")
+    parser.add_argument("--profile-upload", action="store_true", help="Upload profiling artifacts to the cloud (update_config can toggle this)")
+
     return parser.parse_args()
 
 
-def setup_camera(args):
-    """Initialize camera based on arguments."""
-    # Check if source is a file (stub camera)
+def open_camera(args):
+    """Open the camera described by the arguments.
+
+    Raises:
+        Exception: If the camera cannot be opened
+    """
+    # Video files and image directories replay through a file-backed camera
+    source_path = Path(args.camera_source) if args.camera_source else None
+    if source_path is not None and (
+        source_path.is_dir()
+        or (source_path.is_file() and source_path.suffix.lower() in ReplayCamera.VIDEO_SUFFIXES)
+    ):
+        logger.info(f"Using replay camera with source: {args.camera_source} (pacing={args.replay_pacing})")
+        return ReplayCamera(
+            source_path,
+            pacing=args.replay_pacing,
+            fps=args.replay_fps,
+            cache_frames=args.replay_cache_frames,
+            loop=args.replay_loop,
+        )
+
+    # Check if source is a single image file (stub camera)
     if args.camera_source and Path(args.camera_source).is_file():
         logger.info(f"Using stub camera with image: {args.camera_source}")
         return StubCamera(sample_path=Path(args.camera_source))
 
     # Otherwise use OpenCV camera
+    # Parse camera source (int for device index, str for RTSP URL)
     try:
-        # Parse camera source (int for device index, str for RTSP URL)
-        try:
-            source = int(args.camera_source)
-        except ValueError:
-            source = args.camera_source  # RTSP URL or other string
-
-        # Parse resolution if provided
-        resolution = None
-        if args.camera_resolution:
-            width, height = map(int, args.camera_resolution.split('x'))
-            resolution = (width, height)
-
-        logger.info(f"Initializing OpenCV camera (source={source}, backend={args.camera_backend}, resolution={resolution})")
-
-        camera = OpenCVCamera(
-            source=source,
-            backend=args.camera_backend,
-            resolution=resolution,
-            warmup_frames=args.camera_warmup
+        source = int(args.camera_source)
+    except ValueError:
+        source = args.camera_source  # RTSP URL or other string
+
+    # Parse resolution if provided
+    resolution = None
+    if args.camera_resolution:
+        width, height = map(int, args.camera_resolution.split('x'))
+        resolution = (width, height)
+
+    # Go straight to a known-good mode when the camera has been probed
+    t_start = time.monotonic()
+    caps = None
+    if args.camera_caps_cache:
+        caps = load_capabilities(
+            source,
+            CapabilityCache(args.camera_caps_cache),
+            refresh=args.camera_probe_refresh,
         )
+        # Only probe once per process; reinitializations reuse the cache
+        args.camera_probe_refresh = False
+    args.camera_capabilities = caps
+
+    fourcc = "MJPG"
+    if caps is not None and caps.modes and resolution:
+        mode = caps.find_mode(*resolution)
+        if mode is None:
+            mode = caps.closest_mode(*resolution)
+            logger.warning(
+                f"Resolution {resolution[0]}x{resolution[1]} not supported by camera, "
+                f"using closest known-good mode {mode.width}x{mode.height}"
+            )
+            resolution = (mode.width, mode.height)
+            args.camera_resolution = f"{mode.width}x{mode.height}"
+        fourcc = mode.fourcc
 
-        logger.info("Camera initialized successfully")
-        return camera
+    logger.info(f"Initializing OpenCV camera (source={source}, backend={args.camera_backend}, resolution={resolution}, fourcc={fourcc})")
 
-    except Exception as e:
-        logger.error(f"Failed to initialize camera: {e}")
-        sys.exit(1)
+    camera = OpenCVCamera(
+        source=source,
+        backend=args.camera_backend,
+        resolution=resolution,
+        warmup_frames=args.camera_warmup,
+        fourcc=fourcc,
+    )
 
+    logger.info(f"Camera initialized successfully in {(time.monotonic() - t_start) * 1000:.0f}ms")
+    return camera
+
+
+def report_capabilities(args) -> None:
+    """Send probed camera capabilities to the cloud (best effort, background)."""
+    caps = getattr(args, "camera_capabilities", None)
+    if caps is None:
+        return
+
+    def _post():
+        try:
+            response = requests.post(
+                f"{args.api_url}/v1/devices/{args.device_id}/capabilities",
+                json={"device_id": args.device_id, "camera": caps.to_dict()},
+                timeout=args.upload_timeout,
+            )
+            response.raise_for_status()
+            logger.info("Camera capabilities reported to cloud")
+        except Exception as e:
+            logger.debug(f"Failed to report camera capabilities: {e}")
+
+    threading.Thread(target=_post, name="report-capabilities", daemon=True).start()
 
 
 def setup_light_tower(args) -> LightTower | None:
@@ -120,8 +225,8 @@ def setup_light_tower(args) -> LightTower | None:
         return None
 
     try:
-        tower = LightTower(port=args.alarm_port, baud=args.alarm_baud)
-        logger.info(f"Alarm tower: enabled (port={args.alarm_port}, baud={args.alarm_baud})")
+        tower = LightTower(port=args.alarm_port, baud=args.alarm_baud, batch_writes=args.alarm_batch_writes)
+        logger.info(f"Alarm tower: enabled (port={args.alarm_port}, baud={args.alarm_baud}, batch_writes={args.alarm_batch_writes})")
         # Set initial state to normal (green)
         tower.trigger_normal()
         return tower
@@ -130,19 +235,33 @@ def setup_light_tower(args) -> LightTower | None:
         return None
 
 
+def setup_profiler(args) -> Profiler:
+    """Create the on-demand profiler and register its SIGUSR1 trigger."""
+    profiler = Profiler(
+        output_dir=args.profile_dir,
+        max_bytes=int(args.profile_max_mb * 1024 * 1024),
+        upload_url=f"{args.api_url}/v1/devices/{args.device_id}/diagnostics",
+        upload_enabled=args.profile_upload,
+        upload_timeout=args.upload_timeout,
+    )
+    if profiler.install_signal_handler():
+        logger.info(f"Profiler: idle (send SIGUSR1 or update_config to profile, dir={args.profile_dir})")
+    else:
+        logger.info(f"Profiler: idle (update_config to profile, dir={args.profile_dir})")
+    return profiler
+
+
 def encode_frame_base64(frame) -> str:
     """Encode frame as base64 JPEG."""
-    import cv2
-    import numpy as np
-    from device.capture import Frame
-
-    # Handle Frame objects (from StubCamera)
+    # Handle Frame objects (all cameras return already-encoded frames)
     if isinstance(frame, Frame):
         # Frame already has image bytes, just encode to base64
         image_base64 = base64.b64encode(frame.data).decode('utf-8')
         return image_base64
 
-    # Handle numpy arrays (from OpenCVCamera)
+    # Handle raw numpy arrays (cv2 is preloaded at startup, so this is a lookup)
+    import cv2
+
     # Encode as JPEG
     success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
     if not success:
@@ -155,50 +274,156 @@ def encode_frame_base64(frame) -> str:
     return image_base64
 
 
-def save_frame_debug(frame, trigger_id: str, save_dir: str):
-    """Save frame to debug directory."""
-    import cv2
-    from device.capture import Frame
+def setup_frame_writer(args) -> DebugFrameWriter | None:
+    """Start the background debug frame writer if frame saving is enabled."""
+    if not args.save_frames:
+        return None
+    logger.info(
+        f"Saving debug frames to {args.save_frames_dir} "
+        f"(last {args.save_frames_max_count} frames / {args.save_frames_max_mb:g} MB)"
+    )
+    return DebugFrameWriter(
+        args.save_frames_dir,
+        max_frames=args.save_frames_max_count,
+        max_bytes=int(args.save_frames_max_mb * 1024 * 1024),
+    )
+
+
+class CameraSlot:
+    """Holds the active camera so background threads see reinitializations."""
+
+    def __init__(self, camera=None) -> None:
+        self.camera = camera
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        if camera is not None:
+            self.ready.set()
+
+    def set_camera(self, camera) -> None:
+        with self.lock:
+            self.camera = camera
+        self.ready.set()
+
+
+def preload_modules() -> None:
+    """Import heavy modules once at startup instead of inside hot functions."""
+    t0 = time.monotonic()
+    try:
+        import cv2  # noqa: F401
+        import numpy  # noqa: F401
+    except ImportError:
+        return
+    logger.debug(f"Preloaded cv2/numpy in {(time.monotonic() - t0) * 1000:.0f}ms")
 
-    debug_dir = Path(save_dir)
-    debug_dir.mkdir(parents=True, exist_ok=True)
 
-    filename = f"{trigger_id}.jpg"
-    filepath = debug_dir / filename
+def start_camera(args, camera_slot: CameraSlot, on_ready) -> None:
+    """Open the camera on a background thread, retrying until it succeeds.
 
-    # Handle Frame objects (from StubCamera)
-    if isinstance(frame, Frame):
-        filepath.write_bytes(frame.data)
-    else:
-        # Handle numpy arrays (from OpenCVCamera)
-        cv2.imwrite(str(filepath), frame)
+    Commands that need the camera wait on `camera_slot.ready`, so the command
+    stream can connect while the camera opens and warms up.
+    """
+    def _run():
+        preload_modules()
+        delay = args.reconnect_delay
+        while True:
+            try:
+                camera = open_camera(args)
+                break
+            except Exception as e:
+                logger.error(f"Failed to initialize camera: {e} (retrying in {delay}s)")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+
+        camera_slot.set_camera(camera)
+        logger.info(f"Camera ready {time.monotonic() - STARTUP_T0:.2f}s after startup")
+        on_ready(camera)
 
-    logger.debug(f"Saved debug frame: {filepath}")
+    threading.Thread(target=_run, name="camera-startup", daemon=True).start()
 
 
-def handle_capture_command(camera, command: dict, args):
+def enqueue_camera_work(work_queue: queue.Queue, kind: str, payload: dict) -> None:
+    """Queue a capture or camera config command for the camera worker."""
+    try:
+        work_queue.put_nowait((kind, payload))
+    except queue.Full:
+        logger.warning(f"Camera command queue full, dropping {kind} command: {payload.get('trigger_id', '')}")
+        STATUS.increment("commands_dropped")
+
+
+def run_camera_worker(work_queue: queue.Queue, camera_slot: CameraSlot, args, scheduler, spool, frame_writer, on_camera_changed) -> None:
+    """Execute queued captures and camera config updates in arrival order."""
+    while True:
+        kind, payload = work_queue.get()
+        if not camera_slot.ready.is_set():
+            logger.info("Camera not ready yet, holding queued commands...")
+            camera_slot.ready.wait()
+
+        try:
+            if kind == "capture":
+                execute_capture(camera_slot, payload, args, scheduler, spool, frame_writer)
+            elif kind == "config":
+                with camera_slot.lock:
+                    camera_slot.camera = handle_config_update(camera_slot.camera, payload, args)
+                on_camera_changed(camera_slot.camera)
+        except Exception as e:
+            logger.error(f"Camera worker error ({kind}): {e}", exc_info=True)
+
+
+def upload_capture(payload: dict, args) -> str:
+    """Upload a capture payload to the cloud and return its record ID."""
+    response = requests.post(
+        f"{args.api_url}/v1/captures",
+        json=payload,
+        timeout=args.upload_timeout
+    )
+    response.raise_for_status()
+    return response.json().get("record_id", "unknown")
+
+
+def handle_capture_command(
+    camera_slot: CameraSlot,
+    command: dict,
+    args,
+    spool: UploadSpool | None = None,
+    frame_writer: DebugFrameWriter | None = None,
+    offline: bool = False,
+):
     """
-    Execute a capture command from the cloud.
+    Execute a capture command from the cloud or the local scheduler.
 
     Args:
-        camera: Camera instance
-        command: Command dict with {cmd, trigger_id, type}
+        camera_slot: Holder of the active camera instance
+        command: Command dict with {cmd, trigger_id, type, source}
         args: Command line arguments
+        spool: Spool for payloads that cannot be uploaded while offline
+        frame_writer: Background writer for debug frames (--save-frames)
+        offline: Stream is known to be down; spool without trying to upload
     """
     trigger_id = command.get("trigger_id", "unknown")
     trigger_type = command.get("type", "unknown")
+    trigger_source = command.get("source", "cloud")
 
-    logger.info(f"[{trigger_id}] Executing capture command (type: {trigger_type})")
+    logger.info(f"[{trigger_id}] Executing capture command (type: {trigger_type}, source: {trigger_source})")
 
+    payload = None
     try:
         # Capture frame with flip settings from config
         flip_h = getattr(args, 'flip_horizontal', False)
         flip_v = getattr(args, 'flip_vertical', False)
-        frame = camera.capture(flip_horizontal=flip_h, flip_vertical=flip_v)
+        t_capture = time.monotonic()
+        with camera_slot.lock:
+            frame = camera_slot.camera.capture(
+                flip_horizontal=flip_h,
+                flip_vertical=flip_v,
+                best_of=args.best_of,
+                score_quality=args.quality_scores,
+            )
+        STATUS.record_latency("capture", (time.monotonic() - t_capture) * 1000)
+        STATUS.note_frame(frame, trigger_id)
 
-        # Save debug frame if requested
-        if args.save_frames:
-            save_frame_debug(frame, trigger_id, args.save_frames_dir)
+        # Save debug frame if requested (queued; written off the capture path)
+        if frame_writer is not None:
+            frame_writer.submit(frame, trigger_id)
 
         # Encode as base64
         image_base64 = encode_frame_base64(frame)
@@ -212,29 +437,89 @@ def handle_capture_command(camera, command: dict, args):
             "trigger_label": f"{trigger_type}_{trigger_id}",
             "metadata": {
                 "device_version": "2.0.0",
-                "trigger_type": trigger_type
+                "trigger_type": trigger_type,
+                "trigger_source": trigger_source,
             }
         }
-
-        upload_url = f"{args.api_url}/v1/captures"
+        if frame.quality is not None:
+            payload["metadata"]["quality"] = frame.quality
+            logger.debug(f"[{trigger_id}] Frame quality: {frame.quality}")
+        device_events = STATUS.take_unreported_events()
+        if device_events:
+            payload["metadata"]["device_events"] = device_events
+
+        if offline and spool is not None:
+            # Don't block the scheduler on an upload timeout during an outage
+            logger.info(f"[{trigger_id}] Offline, spooling capture without upload attempt")
+            spool.add(payload)
+            return
 
         logger.debug(f"[{trigger_id}] Uploading capture (size: {len(image_base64)} bytes)")
 
-        response = requests.post(
-            upload_url,
-            json=payload,
-            timeout=args.upload_timeout
-        )
+        t_upload = time.monotonic()
+        record_id = upload_capture(payload, args)
+        STATUS.record_latency("upload", (time.monotonic() - t_upload) * 1000)
+        STATUS.increment("captures_uploaded")
 
-        response.raise_for_status()
+        logger.info(f"[{trigger_id}] ✓ Capture uploaded successfully (record_id: {record_id})")
 
-        result = response.json()
-        record_id = result.get("record_id", "unknown")
+        if not getattr(args, "first_capture_logged", False):
+            args.first_capture_logged = True
+            logger.info(f"First capture completed {time.monotonic() - STARTUP_T0:.2f}s after startup")
 
-        logger.info(f"[{trigger_id}] ✓ Capture uploaded successfully (record_id: {record_id})")
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        if spool is not None and payload is not None:
+            logger.warning(f"[{trigger_id}] Upload failed while offline: {e}")
+            spool.add(payload)
+        else:
+            logger.error(f"[{trigger_id}] ✗ Capture failed: {e}")
+            STATUS.increment("captures_failed")
 
     except Exception as e:
         logger.error(f"[{trigger_id}] ✗ Capture failed: {e}")
+        STATUS.increment("captures_failed")
+
+
+def execute_capture(
+    camera_slot: CameraSlot,
+    command: dict,
+    args,
+    scheduler: LocalScheduler,
+    spool: UploadSpool,
+    frame_writer: DebugFrameWriter | None = None,
+):
+    """Run a capture, reconciling cloud triggers with the local schedule."""
+    if command.get("source", "cloud") == "cloud" and scheduler.should_skip_cloud_trigger(command):
+        logger.info(f"[{command.get('trigger_id', 'unknown')}] Skipping cloud trigger (covered by local schedule)")
+        return
+
+    camera_slot.ready.wait()
+    scheduler.note_capture(command.get("source", "cloud"))
+    use_spool = command.get("source") == "local" and scheduler.offline_policy == "spool"
+    handle_capture_command(
+        camera_slot,
+        command,
+        args,
+        spool=spool if use_spool else None,
+        frame_writer=frame_writer,
+        offline=use_spool and not scheduler.is_online(),
+    )
+
+
+def flush_spool(spool: UploadSpool, args) -> None:
+    """Upload spooled captures in the background after reconnecting."""
+    if len(spool) == 0:
+        return
+    threading.Thread(
+        target=spool.flush,
+        args=(lambda payload: upload_capture(payload, args),),
+        name="spool-flush",
+        daemon=True,
+    ).start()
+
+
+# Camera block keys that describe the capture setup (resolution reset/flip)
+CAMERA_SETTING_KEYS = {"resolution_width", "resolution_height", "flip_horizontal", "flip_vertical"}
 
 
 def handle_config_update(camera, config: dict, args):
@@ -255,6 +540,18 @@ def handle_config_update(camera, config: dict, args):
         logger.debug("No camera config in update, ignoring")
         return camera
 
+    # Best-of-N frame selection (never touches the camera)
+    if "best_of" in camera_config:
+        try:
+            args.best_of = max(1, int(camera_config["best_of"] or 1))
+            logger.info(f"Best-of-N frame selection: {args.best_of}")
+        except (TypeError, ValueError):
+            logger.error(f"✗ Invalid best_of value {camera_config['best_of']!r}, keeping {args.best_of}")
+
+    # Blocks without resolution or flip keys (e.g. best_of alone) leave the camera as is
+    if not CAMERA_SETTING_KEYS.intersection(camera_config):
+        return camera
+
     new_width = camera_config.get("resolution_width")
     new_height = camera_config.get("resolution_height")
 
@@ -267,6 +564,13 @@ def handle_config_update(camera, config: dict, args):
     if new_width and new_height:
         logger.info(f"Received camera config update: resolution {new_width}x{new_height}")
 
+        # Reject resolutions the probed camera cannot deliver without touching it
+        caps = getattr(args, "camera_capabilities", None)
+        if caps is not None and caps.modes and caps.find_mode(int(new_width), int(new_height)) is None:
+            supported = ", ".join(caps.resolutions())
+            logger.error(f"✗ Resolution {new_width}x{new_height} not supported by camera (supported: {supported})")
+            return camera
+
         # Store previous resolution for fallback
         previous_resolution = args.camera_resolution
 
@@ -277,7 +581,7 @@ def handle_config_update(camera, config: dict, args):
         try:
             logger.info("Reinitializing camera with new resolution...")
             camera.release()
-            camera = setup_camera(args)
+            camera = open_camera(args)
             logger.info(f"✓ Camera reinitialized with resolution {new_width}x{new_height}")
         except Exception as e:
             logger.error(f"✗ Failed to reinitialize camera: {e}")
@@ -285,7 +589,7 @@ def handle_config_update(camera, config: dict, args):
             logger.info(f"Reverting to previous resolution: {previous_resolution or 'default'}")
             args.camera_resolution = previous_resolution
             try:
-                camera = setup_camera(args)
+                camera = open_camera(args)
                 logger.info("✓ Camera recovered with previous resolution")
             except Exception as recovery_error:
                 logger.error(f"✗ Camera recovery failed: {recovery_error}")
@@ -298,7 +602,7 @@ def handle_config_update(camera, config: dict, args):
         try:
             logger.info("Reinitializing camera with default resolution...")
             camera.release()
-            camera = setup_camera(args)
+            camera = open_camera(args)
             logger.info("✓ Camera reinitialized with default resolution")
         except Exception as e:
             logger.error(f"✗ Failed to reinitialize camera: {e}")
@@ -307,7 +611,7 @@ def handle_config_update(camera, config: dict, args):
 
 
 
-def handle_alarm_command(light_tower: LightTower | None, command: dict, args):
+def handle_alarm_command(light_tower: LightTower | None, command: dict, args, received_at: float | None = None):
     """
     Handle alarm command from cloud based on AI evaluation state.
 
@@ -315,6 +619,7 @@ def handle_alarm_command(light_tower: LightTower | None, command: dict, args):
         light_tower: LightTower instance (or None if disabled)
         command: Command dict with {cmd, state, record_id}
         args: Command line arguments
+        received_at: time.monotonic() when the SSE event was read, for latency tracking
     """
     if light_tower is None:
         logger.debug("Alarm command received but tower is disabled")
@@ -329,9 +634,27 @@ def handle_alarm_command(light_tower: LightTower | None, command: dict, args):
         # Handle alarm based on AI evaluation state
         # 'alert' -> red flash + beep (timed)
         # 'normal' or 'uncertain' -> green on
-        light_tower.handle_alarm_state(state, beep_duration=args.alarm_beep_duration)
+        written = light_tower.handle_alarm_state(state, beep_duration=args.alarm_beep_duration)
     except Exception as e:
         logger.error(f"[{record_id}] Alarm command failed: {e}")
+        return
+
+    # End-to-end latency: SSE event received -> serial write complete
+    if received_at is not None and written:
+        latency_ms = (time.monotonic() - received_at) * 1000
+        STATUS.record_latency("alarm", latency_ms)
+        if latency_ms > args.alarm_sla_ms:
+            STATUS.increment("alarm_sla_missed")
+            logger.warning(f"[{record_id}] Alarm latency {latency_ms:.0f}ms exceeded SLA ({args.alarm_sla_ms:.0f}ms)")
+        else:
+            logger.info(f"[{record_id}] Alarm applied in {latency_ms:.0f}ms")
+
+
+def run_alarm_lane(alarm_queue: queue.Queue, tower_future, args) -> None:
+    """Apply alarm commands on a dedicated thread, never behind camera work."""
+    while True:
+        command, received_at = alarm_queue.get()
+        handle_alarm_command(tower_future.result(), command, args, received_at=received_at)
 
 
 def main():
@@ -349,11 +672,78 @@ def main():
     logger.info(f"Camera: {args.camera_source}")
     logger.info("=" * 60)
 
-    # Setup camera
-    camera = setup_camera(args)
+    # Start camera open/warmup and tower init in parallel with the stream connect;
+    # commands that need them wait until they are ready
+    camera_slot = CameraSlot()
+    startup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tower-startup")
+    tower_future = startup.submit(setup_light_tower, args)
+    startup.shutdown(wait=False)
+
+    # Setup profiler (no overhead until a profile is requested)
+    profiler = setup_profiler(args)
+
+    # Background debug frame writer (--save-frames)
+    frame_writer = setup_frame_writer(args)
+
+    # Local interval scheduler (idle until the cloud pushes a schedule)
+    stream_online = threading.Event()
+    spool = UploadSpool(args.spool_dir, max_items=args.spool_max_items)
+    scheduler = LocalScheduler(
+        fire=lambda command: execute_capture(camera_slot, command, args, scheduler, spool, frame_writer),
+        is_online=stream_online.is_set,
+    )
+
+    # Camera stall watchdog (live cameras only, started once the camera is open)
+    watchdog = None
+    if args.camera_watchdog:
+        watchdog = CameraWatchdog(
+            camera_slot,
+            reopen=lambda: open_camera(args),
+            stall_seconds=args.watchdog_stall_seconds,
+            probe_interval=args.watchdog_probe_interval,
+            recovery_cooldown=args.watchdog_recovery_cooldown,
+        )
 
-    # Setup alarm tower
-    light_tower = setup_light_tower(args)
+    def on_camera_changed(camera):
+        STATUS.camera = camera
+        if watchdog is not None and isinstance(camera, OpenCVCamera):
+            watchdog.attach(camera)
+
+    def on_camera_ready(camera):
+        STATUS.camera = camera
+        report_capabilities(args)
+        if watchdog is not None and isinstance(camera, OpenCVCamera):
+            watchdog.start()
+
+    start_camera(args, camera_slot, on_camera_ready)
+
+    # Captures and camera config changes run on a worker so the SSE loop never
+    # blocks on the camera (and can accept commands before it is ready)
+    camera_work: queue.Queue = queue.Queue(maxsize=args.command_queue_size)
+    threading.Thread(
+        target=run_camera_worker,
+        args=(camera_work, camera_slot, args, scheduler, spool, frame_writer, on_camera_changed),
+        name="camera-worker",
+        daemon=True,
+    ).start()
+
+    # Alarm priority lane: alarms skip the camera queue and go straight to the tower
+    alarm_queue: queue.Queue = queue.Queue()
+    threading.Thread(
+        target=run_alarm_lane,
+        args=(alarm_queue, tower_future, args),
+        name="alarm-lane",
+        daemon=True,
+    ).start()
+
+    # Local status endpoint
+    STATUS.queue_depth = lambda: len(spool) + camera_work.qsize()
+    tower_future.add_done_callback(lambda f: setattr(STATUS, "tower", f.result()))
+    if args.status_port:
+        try:
+            start_status_server(args.status_bind, args.status_port)
+        except OSError as e:
+            logger.error(f"Failed to start status server on {args.status_bind}:{args.status_port}: {e}")
 
     # Connect to command stream with device version
     stream_url = f"{args.api_url}/v1/devices/{args.device_id}/commands?device_version={DEVICE_VERSION}"
@@ -361,6 +751,8 @@ def main():
     logger.info(f"Connecting to command stream: {stream_url} (version: {DEVICE_VERSION})")
 
     while True:
+        stream_online.clear()
+        STATUS.set_stream_connected(False)
         try:
             # Connect to SSE stream
             response = requests.get(
@@ -372,11 +764,15 @@ def main():
             response.raise_for_status()
 
             logger.info("✓ Connected to command stream")
+            stream_online.set()
+            STATUS.set_stream_connected(True)
+            flush_spool(spool, args)
 
             # Process SSE events
             for line in response.iter_lines():
                 if not line:
                     continue
+                received_at = time.monotonic()
 
                 # Parse SSE event
                 line = line.decode('utf-8')
@@ -386,26 +782,37 @@ def main():
 
                     try:
                         event = json.loads(data)
-
-                        # Handle different event types
-                        if event.get("event") == "connected":
+                        if "cmd" in event:
+                            STATUS.note_command(event["cmd"])
+                            if not getattr(args, "first_command_logged", False):
+                                args.first_command_logged = True
+                                logger.info(f"First command accepted {time.monotonic() - STARTUP_T0:.2f}s after startup")
+
+                        # Handle different event types (alarms first: latency-critical)
+                        if event.get("cmd") == "alarm":
+                            # Hand off to the alarm lane (never waits on capture work)
+                            alarm_queue.put((event, received_at))
+
+                        elif event.get("event") == "connected":
                             logger.info(f"✓ Connection confirmed by server")
 
                         elif event.get("event") == "ping":
                             logger.debug("← Keepalive ping received")
 
                         elif event.get("cmd") == "capture":
-                            # Execute capture command
-                            handle_capture_command(camera, event, args)
+                            # Queue capture command (runs as soon as the camera is ready)
+                            enqueue_camera_work(camera_work, "capture", event)
 
                         elif event.get("cmd") == "update_config":
                             # Handle config update from cloud
                             config = event.get("config", {})
-                            camera = handle_config_update(camera, config, args)
-
-                        elif event.get("cmd") == "alarm":
-                            # Handle alarm command from cloud
-                            handle_alarm_command(light_tower, event, args)
+                            if "profiling" in config:
+                                profiler.apply_config(config["profiling"])
+                            if "schedule" in config:
+                                scheduler.apply_config(config["schedule"])
+                            if "camera" in config:
+                                # Ordered with queued captures on the camera worker
+                                enqueue_camera_work(camera_work, "config", config)
 
                         else:
                             logger.warning(f"Unknown event: {event}")
@@ -435,10 +842,19 @@ def main():
             logger.info(f"Reconnecting in {args.reconnect_delay} seconds...")
             time.sleep(args.reconnect_delay)
 
+    scheduler.stop()
+    profiler.stop()
+    if watchdog is not None:
+        watchdog.stop()
+    if frame_writer is not None:
+        frame_writer.close()
+
     # Cleanup: turn off alarm tower on exit
+    light_tower = tower_future.result()
     if light_tower:
         logger.info("Turning off alarm tower...")
         light_tower.all_off()
+        light_tower.close()
 
     logger.info("Device client stopped")
 
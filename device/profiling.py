@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Opt-in Profiling for Long-Running Device Processes
+
+Provides CPU sampling, tracemalloc snapshots and resource tracking (RSS, open
+file descriptors, threads) for the device client. Nothing runs until a
+profile is requested through an `update_config` command or SIGUSR1, so the
+overhead is zero when profiling is off.
+
+Profiles are written to a capped local directory and can optionally be
+uploaded to the cloud as diagnostic artifacts.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Innermost Python frames of threads parked in a blocking wait (queue/Event/
+# Condition waits, select loops, socket reads). Samples of these are idle
+# time, not CPU, and are excluded from the CPU profile.
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+}
+
+
+def read_resource_usage() -> dict:
+    """Return current RSS (bytes), open file descriptor and thread counts."""
+    usage = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "rss_bytes": None,
+        "open_fds": None,
+        "threads": threading.active_count(),
+    }
+
+    # /proc is available on the Pi; fall back gracefully elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        usage["rss_bytes"] = resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # ru_maxrss is peak RSS in KiB on Linux
+            usage["rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            pass
+
+    try:
+        usage["open_fds"] = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+
+    return usage
+
+
+class Profiler:
+    """On-demand CPU/memory/resource profiler writing to a capped directory."""
+
+    RESOURCE_SEGMENT_BYTES = 1024 * 1024  # Start a new resources-*.jsonl past this size
+
+    def __init__(
+        self,
+        output_dir: str | Path = "config/profiles",
+        *,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_files: int = 100,
+        upload_url: str | None = None,
+        upload_enabled: bool = False,
+        upload_timeout: float = 30.0,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.upload_url = upload_url
+        self.upload_enabled = upload_enabled
+        self.upload_timeout = upload_timeout
+
+        self._lock = threading.Lock()
+        self._cpu_thread: threading.Thread | None = None
+        self._monitor_thread: threading.Thread | None = None
+        self._monitor_stop = threading.Event()
+        self._last_snapshot: tracemalloc.Snapshot | None = None
+
+    # ------------------------------------------------------------------
+    # Control surface
+    # ------------------------------------------------------------------
+
+    def apply_config(self, config: dict) -> None:
+        """Apply a `profiling` block from an `update_config` command.
+
+        Supported keys:
+            cpu_seconds: Run the CPU sampler for this many seconds
+            cpu_interval: Sampling interval in seconds (default 0.01)
+            tracemalloc: True to start allocation tracing, False to stop it
+            memory_snapshot: True to write a snapshot (and diff vs. previous)
+            resource_interval: Seconds between resource samples (0 stops)
+            upload: Turn artifact upload on or off
+
+        Invalid values are logged and the whole block is ignored.
+        """
+        try:
+            resource_interval = float(config.get("resource_interval") or 0)
+            cpu_seconds = float(config.get("cpu_seconds") or 0)
+            cpu_interval = float(config.get("cpu_interval", 0.01))
+            if cpu_seconds and not cpu_interval > 0:
+                raise ValueError(f"cpu_interval must be positive, got {cpu_interval}")
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.error(f"✗ Invalid profiling config {config!r}, ignoring: {e}")
+            return
+
+        if "upload" in config:
+            self.upload_enabled = bool(config["upload"])
+            if self.upload_enabled and not self.upload_url:
+                logger.warning("Profile upload requested but no upload URL is configured")
+
+        if "tracemalloc" in config:
+            if config["tracemalloc"]:
+                self.start_tracemalloc()
+            else:
+                self.stop_tracemalloc()
+
+        if config.get("memory_snapshot"):
+            threading.Thread(target=self.snapshot_memory, name="profiler-mem", daemon=True).start()
+
+        if "resource_interval" in config:
+            if resource_interval > 0:
+                self.start_resource_monitor(resource_interval)
+            else:
+                self.stop_resource_monitor()
+
+        if cpu_seconds > 0:
+            self.start_cpu_profile(cpu_seconds, interval=cpu_interval)
+
+    def install_signal_handler(
+        self,
+        signum: int | None = getattr(signal, "SIGUSR1", None),
+        cpu_seconds: float = 30.0,
+    ) -> bool:
+        """Run a CPU profile and memory snapshot when `signum` is received.
+
+        Usage: `sudo systemctl kill -s USR1 visant-device-v2.service`
+
+        Returns:
+            False if the platform has no such signal (e.g. Windows)
+        """
+        if signum is None:
+            return False
+
+        def _handler(_signum, _frame):
+            logger.info(f"Profiling requested by signal {_signum}")
+            threading.Thread(
+                target=self._run_signal_profile,
+                args=(cpu_seconds,),
+                name="profiler-signal",
+                daemon=True,
+            ).start()
+
+        signal.signal(signum, _handler)
+        return True
+
+    def _run_signal_profile(self, cpu_seconds: float) -> None:
+        """CPU profile plus a memory diff over the same window.
+
+        tracemalloc is stopped again afterwards unless it was already running,
+        so a one-off signal leaves no tracing overhead behind.
+        """
+        started_tracing = not tracemalloc.is_tracing()
+        self.start_tracemalloc()
+        self._last_snapshot = self._take_snapshot()  # Baseline for the diff
+
+        if self.start_cpu_profile(cpu_seconds):
+            self._cpu_thread.join()
+        else:
+            time.sleep(cpu_seconds)
+
+        self.snapshot_memory()
+        if started_tracing:
+            self.stop_tracemalloc()
+
+    def stop(self) -> None:
+        """Stop all background profiling activity."""
+        self.stop_resource_monitor()
+        self.stop_tracemalloc()
+
+    # ------------------------------------------------------------------
+    # CPU sampling
+    # ------------------------------------------------------------------
+
+    def start_cpu_profile(self, duration: float, interval: float = 0.01) -> bool:
+        """Start a sampling CPU profile in the background.
+
+        Returns:
+            False if a CPU profile is already running
+        """
+        with self._lock:
+            if self._cpu_thread is not None and self._cpu_thread.is_alive():
+                logger.warning("CPU profile already running, ignoring request")
+                return False
+            self._cpu_thread = threading.Thread(
+                target=self._run_cpu_profile,
+                args=(duration, interval),
+                name="profiler-cpu",
+                daemon=True,
+            )
+            self._cpu_thread.start()
+        return True
+
+    def _run_cpu_profile(self, duration: float, interval: float) -> None:
+        """Sample running threads' stacks and write collapsed (flamegraph) stacks.
+
+        Threads blocked in a known wait (IDLE_FRAMES) are skipped. Threads in
+        C calls without a Python wait frame (e.g. time.sleep) are still
+        counted, so the profile approximates CPU rather than measuring it.
+        """
+        logger.info(f"CPU profile started ({duration:g}s @ {interval * 1000:g}ms)")
+        own_id = threading.get_ident()
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: collections.Counter[str] = collections.Counter()
+        samples = 0
+        idle = 0
+
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    idle += 1
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(thread_names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(parts))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+        path = self._write_artifact("cpu", "folded", "\n".join(lines) + "\n")
+        logger.info(f"CPU profile complete: {samples} samples ({idle} idle thread samples skipped) -> {path}")
+
+    # ------------------------------------------------------------------
+    # Memory snapshots
+    # ------------------------------------------------------------------
+
+    def start_tracemalloc(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info("tracemalloc started")
+
+    def stop_tracemalloc(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._last_snapshot = None
+            logger.info("tracemalloc stopped")
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def snapshot_memory(self, top: int = 50) -> Path | None:
+        """Write top allocations and the diff against the previous snapshot."""
+        if not tracemalloc.is_tracing():
+            logger.warning("Memory snapshot requested but tracemalloc is not running")
+            return None
+
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [f"# traced current={current} peak={peak}", "", "## top allocations"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+        if self._last_snapshot is not None:
+            lines += ["", "## diff vs previous snapshot"]
+            lines += [str(stat) for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:top]]
+        self._last_snapshot = snapshot
+
+        path = self._write_artifact("mem", "txt", "\n".join(lines) + "\n")
+        logger.info(f"Memory snapshot written: {path}")
+        return path
+
+    # ------------------------------------------------------------------
+    # Resource tracking
+    # ------------------------------------------------------------------
+
+    def start_resource_monitor(self, interval: float) -> None:
+        self.stop_resource_monitor()
+        self._monitor_stop.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._run_resource_monitor,
+            args=(interval,),
+            name="profiler-resources",
+            daemon=True,
+        )
+        self._monitor_thread.start()
+        logger.info(f"Resource monitor started (every {interval:g}s)")
+
+    def stop_resource_monitor(self) -> None:
+        if self._monitor_thread is not None:
+            self._monitor_stop.set()
+            self._monitor_thread.join(timeout=5)
+            self._monitor_thread = None
+            logger.info("Resource monitor stopped")
+
+    def _resource_path(self) -> Path:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+        return self.output_dir / f"resources-{stamp}.jsonl"
+
+    def _run_resource_monitor(self, interval: float) -> None:
+        # Segmented so the directory cap drops old history, not all of it
+        segment_bytes = max(4096, min(self.RESOURCE_SEGMENT_BYTES, self.max_bytes // 4))
+        path = self._resource_path()
+        while not self._monitor_stop.wait(interval):
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                with open(path, "a") as f:
+                    f.write(json.dumps(read_resource_usage()) + "\n")
+                    size = f.tell()
+                if size >= segment_bytes:
+                    path = self._resource_path()
+                self._enforce_cap()
+            except OSError as e:
+                logger.error(f"Resource monitor write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Artifact storage
+    # ------------------------------------------------------------------
+
+    def _write_artifact(self, kind: str, suffix: str, content: str) -> Path | None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+        path = self.output_dir / f"{kind}-{stamp}.{suffix}"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+            self._enforce_cap()
+        except OSError as e:
+            logger.error(f"Failed to write profile artifact: {e}")
+            return None
+
+        if self.upload_enabled and self.upload_url:
+            self._upload(path)
+        return path
+
+    def _enforce_cap(self) -> None:
+        """Delete oldest artifacts until the directory is within its limits."""
+        with self._lock:
+            files = sorted(
+                (p for p in self.output_dir.iterdir() if p.is_file()),
+                key=lambda p: p.stat().st_mtime,
+            )
+            total = sum(p.stat().st_size for p in files)
+            while files and (total > self.max_bytes or len(files) > self.max_files):
+                oldest = files.pop(0)
+                total -= oldest.stat().st_size
+                oldest.unlink(missing_ok=True)
+                logger.debug(f"Removed old profile artifact: {oldest}")
+
+    def _upload(self, path: Path) -> None:
+        import requests
+
+        try:
+            with open(path, "rb") as f:
+                response = requests.post(
+                    self.upload_url,
+                    files={"file": (path.name, f, "text/plain")},
+                    data={"kind": path.name.split("-", 1)[0]},
+                    timeout=self.upload_timeout,
+                )
+            response.raise_for_status()
+            logger.info(f"Uploaded diagnostic artifact: {path.name}")
+        except Exception as e:
+            logger.error(f"Diagnostic upload failed for {path.name}: {e}")
+
+
+__all__ = ["IDLE_FRAMES", "Profiler", "read_resource_usage"]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+On-Device Frame Quality Scoring
+
+Cheap vectorized metrics used to pick the best of N frames before upload:
+Laplacian variance for sharpness and grayscale histogram statistics for
+exposure. Scores are attached to capture metadata so the cloud can skip
+inference on frames that clearly fail.
+
+Benchmark the per-frame scoring cost on the device with:
+    python -m device.quality --width 1920 --height 1080
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+
+# Frames are downscaled to this width before scoring; keeps the cost roughly
+# constant across resolutions and makes scores comparable between devices
+SCORE_WIDTH = 320
+
+# Exposure limits (fraction of clipped pixels / mean brightness on 0-255)
+MAX_CLIPPED_FRACTION = 0.25
+MIN_BRIGHTNESS = 20.0
+MAX_BRIGHTNESS = 235.0
+
+
+@dataclass
+class FrameQuality:
+    """Quality metrics for one frame."""
+
+    sharpness: float       # Laplacian variance (higher is sharper)
+    brightness: float      # Mean gray level (0-255)
+    contrast: float        # Gray level standard deviation
+    dark_clipped: float    # Fraction of pixels at or near black
+    bright_clipped: float  # Fraction of pixels at or near white
+    score_ms: float = 0.0  # Time spent scoring
+
+    @property
+    def exposure_ok(self) -> bool:
+        return (
+            self.dark_clipped < MAX_CLIPPED_FRACTION
+            and self.bright_clipped < MAX_CLIPPED_FRACTION
+            and MIN_BRIGHTNESS < self.brightness < MAX_BRIGHTNESS
+        )
+
+    def to_dict(self) -> dict:
+        data = {key: round(value, 4) for key, value in asdict(self).items()}
+        data["exposure_ok"] = self.exposure_ok
+        return data
+
+
+def score_frame(frame, cv2_module) -> FrameQuality:
+    """Score a BGR (or grayscale) frame as returned by OpenCV."""
+    t0 = time.perf_counter()
+
+    gray = frame if frame.ndim == 2 else cv2_module.cvtColor(frame, cv2_module.COLOR_BGR2GRAY)
+    h, w = gray.shape[:2]
+    if w > SCORE_WIDTH:
+        gray = cv2_module.resize(
+            gray, (SCORE_WIDTH, max(1, int(h * SCORE_WIDTH / w))), interpolation=cv2_module.INTER_AREA
+        )
+
+    sharpness = float(cv2_module.Laplacian(gray, cv2_module.CV_64F).var())
+
+    hist = cv2_module.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    hist /= max(float(hist.sum()), 1.0)
+    mean, stddev = cv2_module.meanStdDev(gray)
+
+    return FrameQuality(
+        sharpness=sharpness,
+        brightness=float(mean[0][0]),
+        contrast=float(stddev[0][0]),
+        dark_clipped=float(hist[:6].sum()),
+        bright_clipped=float(hist[250:].sum()),
+        score_ms=(time.perf_counter() - t0) * 1000,
+    )
+
+
+def select_best(qualities: list[FrameQuality]) -> int:
+    """Return the index of the best frame: well exposed first, then sharpest."""
+    return max(range(len(qualities)), key=lambda i: (qualities[i].exposure_ok, qualities[i].sharpness))
+
+
+# CLI benchmark for measuring scoring cost on the device
+if __name__ == "__main__":
+    import argparse
+
+    import cv2
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Benchmark frame quality scoring")
+    parser.add_argument("--image", help="Score this image instead of a synthetic frame")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.image:
+        frame = cv2.imread(args.image, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise SystemExit(f"Unable to read image: {args.image}")
+    else:
+        frame = np.random.default_rng(0).integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+
+    score_frame(frame, cv2)  # warm up
+    timings = sorted(score_frame(frame, cv2).score_ms for _ in range(args.iterations))
+    h, w = frame.shape[:2]
+    print(f"Frame {w}x{h}, {args.iterations} iterations")
+    print(f"  mean: {sum(timings) / len(timings):.2f} ms")
+    print(f"  p50:  {timings[len(timings) // 2]:.2f} ms")
+    print(f"  p95:  {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+    print(f"  last: {score_frame(frame, cv2).to_dict()}")
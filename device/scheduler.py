@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Device-Side Interval Capture Scheduler
+
+Optional local scheduler for cloud-pushed interval schedules. Captures fire on
+a monotonic-clock timeline (anchor + k * interval) so they never drift, keep
+running while the command stream is down, and are reconciled with
+cloud-issued triggers so the same moment is not captured twice.
+
+Schedule config (from `update_config`):
+    {"schedule": {"enabled": true, "interval_seconds": 60,
+                  "offline_policy": "spool", "dedupe_window_seconds": 5}}
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import uuid
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_POLICIES = ("spool", "drop")
+
+# Trigger `type` values assumed to come from the cloud scheduler; these are
+# the ones a local schedule replaces. The cloud does not document its trigger
+# types, so this set is a best guess: any other type (e.g. manual) is always
+# executed, which errs on the side of capturing twice rather than never.
+CLOUD_SCHEDULED_TYPES = {"scheduled", "interval"}
+
+
+class LocalScheduler:
+    """Fire capture commands locally at a fixed, drift-free interval."""
+
+    def __init__(
+        self,
+        fire: Callable[[dict], None],
+        is_online: Callable[[], bool] = lambda: True,
+    ) -> None:
+        self._fire = fire
+        self._is_online = is_online
+
+        self.enabled = False
+        self.interval = 0.0
+        self.offline_policy = "spool"
+        self.dedupe_window = 5.0
+
+        self._lock = threading.Lock()
+        # Start time of the most recent capture per source ("local"/"cloud")
+        self._last_capture: dict[str, float] = {}
+        self._stop = threading.Event()
+
+    def apply_config(self, schedule: dict) -> None:
+        """Start, stop or retime the local schedule.
+
+        Invalid values are logged and the current schedule is kept.
+        """
+        try:
+            enabled = bool(schedule.get("enabled", True))
+            interval = float(schedule.get("interval_seconds") or 0)
+            dedupe_window = float(schedule.get("dedupe_window_seconds", self.dedupe_window))
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.error(f"✗ Invalid schedule config {schedule!r}, keeping current schedule: {e}")
+            return
+        if not (math.isfinite(interval) and math.isfinite(dedupe_window)) or dedupe_window < 0:
+            logger.error(f"✗ Invalid schedule config {schedule!r}, keeping current schedule")
+            return
+
+        policy = schedule.get("offline_policy", self.offline_policy)
+        if policy not in OFFLINE_POLICIES:
+            logger.warning(f"Unknown offline policy {policy!r}, keeping {self.offline_policy!r}")
+            policy = self.offline_policy
+
+        self.stop()
+        self.offline_policy = policy
+        self.dedupe_window = dedupe_window
+
+        if not enabled or interval <= 0:
+            self.enabled = False
+            logger.info("Local schedule: disabled (cloud-triggered captures only)")
+            return
+
+        self.enabled = True
+        self.interval = interval
+        # Each run gets its own stop event so retiming never waits for an
+        # in-flight capture on the previous timeline
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, args=(self._stop, interval), name="local-scheduler", daemon=True).start()
+        logger.info(
+            f"Local schedule: every {interval:g}s "
+            f"(offline_policy={policy}, dedupe_window={self.dedupe_window:g}s)"
+        )
+
+    def is_online(self) -> bool:
+        """True while the command stream is connected."""
+        return self._is_online()
+
+    def stop(self) -> None:
+        """Stop the current timeline (returns immediately)."""
+        self._stop.set()
+
+    def note_capture(self, source: str = "cloud") -> None:
+        """Record that a capture from `source` ("local" or "cloud") is starting."""
+        with self._lock:
+            self._last_capture[source] = time.monotonic()
+
+    def _recently_captured(self, source: str) -> bool:
+        with self._lock:
+            last = self._last_capture.get(source)
+        return last is not None and time.monotonic() - last < self.dedupe_window
+
+    def should_skip_cloud_trigger(self, command: dict) -> bool:
+        """True if a cloud-scheduled trigger duplicates a local capture.
+
+        Only types in CLOUD_SCHEDULED_TYPES are considered (see above).
+        """
+        if not self.enabled or command.get("type") not in CLOUD_SCHEDULED_TYPES:
+            return False
+        return self._recently_captured("local")
+
+    def _run(self, stop: threading.Event, interval: float) -> None:
+        anchor = time.monotonic()
+        tick = 1
+        while not stop.wait(max(0.0, anchor + tick * interval - time.monotonic())):
+            # Only cloud captures count: local ticks never dedupe each other,
+            # so intervals shorter than the dedupe window are kept
+            if self._recently_captured("cloud"):
+                logger.info("Local schedule: skipping tick (cloud capture within dedupe window)")
+            elif not self._is_online() and self.offline_policy == "drop":
+                logger.info("Local schedule: offline, dropping tick (offline_policy=drop)")
+            else:
+                command = {
+                    "cmd": "capture",
+                    "trigger_id": f"local-{uuid.uuid4().hex[:12]}",
+                    "type": "local_interval",
+                    "source": "local",
+                }
+                try:
+                    self._fire(command)
+                except Exception as e:
+                    logger.error(f"Local schedule capture failed: {e}")
+
+            # Next slot on the fixed timeline; slots missed while a capture
+            # overran are skipped instead of fired back-to-back
+            elapsed = time.monotonic() - anchor
+            tick = max(tick + 1, math.floor(elapsed / interval) + 1)
+
+
+__all__ = ["LocalScheduler", "OFFLINE_POLICIES", "CLOUD_SCHEDULED_TYPES"]
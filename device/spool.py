@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline Upload Spool
+
+Bounded on-disk queue of capture payloads that could not be uploaded while
+the device was offline. Payloads are replayed oldest-first once the command
+stream reconnects.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSpool:
+    """Directory of pending capture payloads (one JSON file each)."""
+
+    def __init__(self, directory: str | Path = "config/spool", max_items: int = 200) -> None:
+        self.directory = Path(directory)
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+
+    def _files(self) -> list[Path]:
+        try:
+            return sorted(self.directory.glob("*.json"))
+        except OSError:
+            return []
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    def add(self, payload: dict) -> None:
+        """Spool a payload, dropping the oldest entries beyond `max_items`."""
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                name = f"{time.time_ns()}-{payload.get('trigger_id', 'unknown')}.json"
+                tmp_path = self.directory / f".{name}.tmp"
+                tmp_path.write_text(json.dumps(payload))
+                os.replace(tmp_path, self.directory / name)
+            except OSError as e:
+                logger.error(f"Failed to spool capture {payload.get('trigger_id')}: {e}")
+                return
+
+            files = self._files()
+            for old in files[: max(0, len(files) - self.max_items)]:
+                old.unlink(missing_ok=True)
+                logger.warning(f"Spool full, dropped oldest capture: {old.name}")
+
+        logger.info(f"[{payload.get('trigger_id')}] Capture spooled for later upload ({len(self)} pending)")
+
+    def flush(self, send: Callable[[dict], None]) -> int:
+        """Send spooled payloads oldest-first; stop at the first failure.
+
+        Returns:
+            Number of payloads sent
+        """
+        if not self._flushing.acquire(blocking=False):
+            return 0  # Another flush is already running
+        sent = 0
+        try:
+            for path in self._files():
+                try:
+                    payload = json.loads(path.read_text())
+                except (OSError, ValueError) as e:
+                    logger.error(f"Discarding unreadable spooled capture {path.name}: {e}")
+                    path.unlink(missing_ok=True)
+                    continue
+                try:
+                    send(payload)
+                except Exception as e:
+                    logger.warning(f"Spool flush paused ({len(self)} pending): {e}")
+                    break
+                path.unlink(missing_ok=True)
+                sent += 1
+        finally:
+            self._flushing.release()
+
+        if sent:
+            logger.info(f"Spool flushed: {sent} capture(s) uploaded")
+        return sent
+
+
+__all__ = ["UploadSpool"]
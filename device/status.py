@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local Health and Status Endpoint
+
+A small opt-in HTTP server (bind it to localhost or the Tailscale interface)
+that exposes device health without reading journald:
+
+    GET /status        JSON: stream state, last command, camera, frame age,
+                       upload queue depth, latency histograms, tower state
+    GET /snapshot.jpg  Most recent already-encoded frame (never triggers a capture)
+
+The capture path only stores references and bumps histogram counters, so it
+costs effectively nothing per capture. The server runs on its own thread.
+"""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with O(1)-ish recording."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{b}" for b in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+def _iso(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class DeviceStatus:
+    """Process-wide device state shared with the status server."""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.stream_connected = False
+        self.stream_changed_at: float | None = None
+        self.last_command: str | None = None
+        self.last_command_at: float | None = None
+
+        self.camera = None
+        self.tower = None
+        self.queue_depth: Callable[[], int] | None = None
+
+        self.last_frame_data: bytes | None = None
+        self.last_frame_encoding = "jpeg"
+        self.last_frame_at: float | None = None
+        self.last_trigger_id: str | None = None
+
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.counters: dict[str, int] = {}
+        self.events: collections.deque[dict] = collections.deque(maxlen=50)
+        self._unreported_events: list[dict] = []
+        self._events_lock = threading.Lock()
+
+    def set_stream_connected(self, connected: bool) -> None:
+        if connected != self.stream_connected:
+            self.stream_connected = connected
+            self.stream_changed_at = time.time()
+
+    def note_command(self, name: str) -> None:
+        self.last_command = name
+        self.last_command_at = time.time()
+
+    def note_frame(self, frame, trigger_id: str | None = None) -> None:
+        """Keep a reference to the latest encoded frame (no copy, no encode)."""
+        self.last_frame_data = frame.data
+        self.last_frame_encoding = frame.encoding
+        self.last_frame_at = time.time()
+        self.last_trigger_id = trigger_id
+
+    def record_latency(self, name: str, value_ms: float) -> None:
+        histogram = self.latency.get(name)
+        if histogram is None:
+            histogram = self.latency.setdefault(name, LatencyHistogram())
+        histogram.record(value_ms)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_event(self, name: str, **details) -> None:
+        """Record a notable event for /status and the next capture upload."""
+        event = {"event": name, "at": _iso(time.time()), **details}
+        with self._events_lock:
+            self.events.append(event)
+            self._unreported_events.append(event)
+            del self._unreported_events[:-self.events.maxlen]
+
+    def take_unreported_events(self) -> list[dict]:
+        """Return events not yet sent to the cloud and mark them reported."""
+        with self._events_lock:
+            events, self._unreported_events = self._unreported_events, []
+        return events
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        camera = self.camera
+        tower = self.tower
+        resolution = getattr(camera, "resolution", None)
+        return {
+            "uptime_s": round(now - self.started_at, 1),
+            "stream": {
+                "connected": self.stream_connected,
+                "changed_at": _iso(self.stream_changed_at),
+            },
+            "last_command": {
+                "name": self.last_command,
+                "at": _iso(self.last_command_at),
+            },
+            "camera": {
+                "type": type(camera).__name__ if camera is not None else None,
+                "resolution": f"{resolution[0]}x{resolution[1]}" if resolution else None,
+                "last_frame_at": _iso(self.last_frame_at),
+                "frame_age_s": round(now - self.last_frame_at, 1) if self.last_frame_at else None,
+                "last_trigger_id": self.last_trigger_id,
+            },
+            "upload_queue_depth": self.queue_depth() if self.queue_depth else 0,
+            "tower": {
+                "enabled": tower is not None,
+                "state": getattr(tower, "state", None),
+            },
+            "latency_ms": {name: h.to_dict() for name, h in list(self.latency.items())},
+            "counters": dict(self.counters),
+            "events": list(self.events),
+        }
+
+
+# Shared instance used by the device client
+STATUS = DeviceStatus()
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    status: DeviceStatus = STATUS
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/status"):
+            body = json.dumps(self.status.snapshot(), indent=2).encode()
+            self._send(200, "application/json", body)
+        elif path in ("/snapshot.jpg", "/snapshot"):
+            data = self.status.last_frame_data
+            if data is None:
+                self._send(404, "text/plain", b"No frame captured yet\n")
+            else:
+                encoding = self.status.last_frame_encoding
+                content_type = "image/jpeg" if encoding in ("jpeg", "jpg") else f"image/{encoding}"
+                self._send(200, content_type, data)
+        else:
+            self._send(404, "text/plain", b"Not found\n")
+
+    def _send(self, code: int, content_type: str, body: bytes) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Status server: {self.address_string()} {format % args}")
+
+
+def start_status_server(host: str, port: int, status: DeviceStatus = STATUS) -> ThreadingHTTPServer:
+    """Start the status server on a daemon thread."""
+    handler = type("StatusHandler", (_StatusHandler,), {"status": status})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="status-server", daemon=True).start()
+    logger.info(f"Status server listening on http://{host}:{server.server_address[1]}/status")
+    return server
+
+
+__all__ = ["DeviceStatus", "LatencyHistogram", "STATUS", "start_status_server"]
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Camera Stall Watchdog
+
+Tracks frame freshness for OpenCVCamera and recovers hung USB cameras without
+restarting the service:
+
+- Stalls: `read()` failing or taking longer than `stall_seconds`
+- Frozen images: identical content hash of a downscaled frame for
+  `frozen_frames` consecutive reads (skipped for near-uniform frames, since
+  a dark or lens-capped scene legitimately decodes to identical frames)
+- Dropping fps: flush-grab rate below `min_fps_ratio` of the negotiated fps,
+  counted only when the read is also slow or the image also unchanged
+  (auto-exposure lowers fps in low light on its own)
+
+Frozen/low-fps recoveries are rate-limited by `recovery_cooldown`; read
+failures and stalls always recover.
+
+On detection the camera is reopened on a background thread with bounded
+exponential backoff while the command stream stays connected. Stall and
+recovery events (with time-to-recovery) are reported through the device
+status and attached to the next capture upload.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable
+
+from device.status import STATUS, DeviceStatus
+
+logger = logging.getLogger(__name__)
+
+
+def frame_fingerprint(frame, stride: int = 8) -> bytes:
+    """Hash a strided subsample of the raw frame (sensor noise keeps it unique)."""
+    return hashlib.blake2b(frame[::stride, ::stride].tobytes(), digest_size=8).digest()
+
+
+def frame_is_uniform(frame, threshold: float, stride: int = 16) -> bool:
+    """True for near-constant frames (dark scene, capped lens)."""
+    return float(frame[::stride, ::stride].std()) < threshold
+
+
+class CameraWatchdog:
+    """Detect stalled/frozen cameras and reopen them in the background."""
+
+    def __init__(
+        self,
+        camera_slot,
+        reopen: Callable[[], object],
+        *,
+        stall_seconds: float = 5.0,
+        frozen_frames: int = 3,
+        min_fps_ratio: float = 0.5,
+        slow_fps_reads: int = 3,
+        slow_read_seconds: float = 1.0,
+        uniform_std: float = 4.0,
+        recovery_cooldown: float = 300.0,
+        probe_interval: float = 30.0,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+        status: DeviceStatus = STATUS,
+    ) -> None:
+        self._slot = camera_slot
+        self._reopen = reopen
+        self.stall_seconds = stall_seconds
+        self.frozen_frames = frozen_frames
+        self.min_fps_ratio = min_fps_ratio
+        self.slow_fps_reads = slow_fps_reads
+        self.slow_read_seconds = slow_read_seconds
+        self.uniform_std = uniform_std
+        self.recovery_cooldown = recovery_cooldown
+        self.probe_interval = probe_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._status = status
+
+        self._last_fingerprint: bytes | None = None
+        self._repeat_count = 0
+        self._slow_count = 0
+        self._last_frame_at: float | None = None
+
+        self._detected_at: float | None = None
+        self._recovered_at: float | None = None
+        self._recover = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def attach(self, camera) -> None:
+        """Install the watchdog's frame monitor on a camera that supports it."""
+        if hasattr(camera, "frame_monitor"):
+            camera.frame_monitor = self.observe
+        self._last_fingerprint = None
+        self._repeat_count = 0
+        self._slow_count = 0
+
+    def start(self) -> None:
+        self.attach(self._slot.camera)
+        self._thread = threading.Thread(target=self._run, name="camera-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Camera watchdog: enabled (stall>{self.stall_seconds:g}s, frozen={self.frozen_frames} frames, "
+            f"probe every {self.probe_interval:g}s)"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._recover.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Detection (called from the capture path)
+    # ------------------------------------------------------------------
+
+    def observe(self, frame, read_seconds: float, grab_fps: float | None = None, expected_fps: float | None = None) -> None:
+        """Frame monitor hook: `frame` is None when the read failed."""
+        if frame is None:
+            self._trigger("stall", f"read failed after {read_seconds:.2f}s")
+            return
+
+        self._last_frame_at = time.monotonic()
+        if read_seconds > self.stall_seconds:
+            self._trigger("stall", f"read took {read_seconds:.2f}s")
+            return
+
+        unchanged = False
+        if frame_is_uniform(frame, self.uniform_std):
+            # Dark/capped scenes repeat exactly without the camera being hung
+            self._repeat_count = 0
+            self._last_fingerprint = None
+        else:
+            fingerprint = frame_fingerprint(frame)
+            unchanged = fingerprint == self._last_fingerprint
+            if unchanged:
+                self._repeat_count += 1
+                if self._repeat_count >= self.frozen_frames - 1:
+                    self._trigger("frozen", f"{self._repeat_count + 1} identical frames")
+                    return
+            else:
+                self._repeat_count = 0
+            self._last_fingerprint = fingerprint
+
+        if grab_fps is not None and expected_fps:
+            slow_read = read_seconds > self.slow_read_seconds
+            if grab_fps < expected_fps * self.min_fps_ratio and (slow_read or unchanged):
+                self._slow_count += 1
+                if self._slow_count >= self.slow_fps_reads:
+                    self._trigger("low_fps", f"{grab_fps:.1f} fps (expected {expected_fps:.1f})")
+            else:
+                self._slow_count = 0
+
+    def _trigger(self, kind: str, reason: str) -> None:
+        if self._detected_at is not None:
+            return  # Recovery already pending
+        if (
+            kind != "stall"
+            and self._recovered_at is not None
+            and time.monotonic() - self._recovered_at < self.recovery_cooldown
+        ):
+            logger.debug(f"Camera watchdog: {kind} ({reason}) within recovery cooldown, not reopening")
+            self._status.increment("camera_recoveries_suppressed")
+            return
+        self._detected_at = time.monotonic()
+        logger.warning(f"Camera watchdog: {kind} detected ({reason}), reopening camera in background")
+        self._status.increment(f"camera_{kind}")
+        self._status.record_event("camera_stall", kind=kind, reason=reason)
+        self._recover.set()
+
+    # ------------------------------------------------------------------
+    # Probing and recovery (watchdog thread)
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            triggered = self._recover.wait(self.probe_interval if self.probe_interval > 0 else None)
+            if self._stop.is_set():
+                return
+            if triggered:
+                self._recover.clear()
+                self._recover_camera()
+            else:
+                self._probe()
+
+    def _probe(self) -> None:
+        """Read a frame while idle so hangs are found before the next command."""
+        if self._last_frame_at is not None and time.monotonic() - self._last_frame_at < self.probe_interval:
+            return  # Recent captures already exercised the camera
+        if not self._slot.lock.acquire(blocking=False):
+            return  # Capture in progress
+        try:
+            probe = getattr(self._slot.camera, "probe", None)
+            if probe is not None:
+                probe()
+        except Exception as e:
+            self._trigger("stall", f"probe failed: {e}")
+        finally:
+            self._slot.lock.release()
+
+    def _recover_camera(self) -> None:
+        backoff = self.backoff_initial
+        attempt = 0
+        while not self._stop.is_set():
+            attempt += 1
+            try:
+                with self._slot.lock:
+                    old = self._slot.camera
+                    if old is not None:
+                        old.release()
+                    camera = self._reopen()
+                    self.attach(camera)
+                    self._slot.camera = camera
+                    self._status.camera = camera
+            except Exception as e:
+                logger.error(f"Camera watchdog: reopen attempt {attempt} failed: {e} (retrying in {backoff:g}s)")
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            recovery_s = time.monotonic() - (self._detected_at or time.monotonic())
+            self._detected_at = None
+            self._recovered_at = self._last_frame_at = time.monotonic()
+            self._status.increment("camera_recoveries")
+            self._status.record_latency("camera_recovery", recovery_s * 1000)
+            self._status.record_event("camera_recovered", attempts=attempt, time_to_recovery_s=round(recovery_s, 2))
+            logger.info(f"Camera watchdog: ✓ camera recovered after {recovery_s:.1f}s ({attempt} attempt(s))")
+            return
+
+
+__all__ = ["CameraWatchdog", "frame_fingerprint", "frame_is_uniform"]